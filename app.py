@@ -1,16 +1,64 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+import functools
 import os
+import threading
+import time
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
-from bertopic import BERTopic
-import pandas as pd
 
 # Import our base data functions
-from src.preprocess import load_data, combine_fields, preprocess_documents
+from src.preprocess import iter_records, iter_batches, combine_fields, preprocess_documents, load_preprocessed_documents
 from src.topic_model import get_topic_summary  # Assuming this function is defined in src/topic_model.py
+from src.embedding_cache import EmbeddingCache, encode_with_cache
+from src.model_registry import model_id, warm_up
+from src.embedding_executor import get_executor, throughput_report
+from src.cache_utils import BoundedCache, file_fingerprint, file_digest, model_fingerprint
+from src.snapshot import MODEL_DIRNAME, load_snapshot, load_snapshot_embeddings, save_snapshot
+from src.inverted_index import InvertedIndex
+from src.jobs import JobManager, DONE, FAILED
+from src.document_table import DocumentTable
+from src.ann_index import AnnIndex
+from src.trends import BIN_UNITS, TrendIndex, bin_start_timestamps
+from src.visuals import CHARTS, render_chart
+from src.dedup import deduplicate, expand_topic_model
+from src.domain_models import DomainModel, DomainModelRegistry
+from src import metrics
+from src.metrics import span, timed
 
 app = Flask(__name__)
 
+# Per-request Server-Timing headers (only when metrics are enabled)
+TIMING_HEADERS = os.environ.get("TREND_TIMING_HEADERS", "0") == "1"
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records serialization time as the 'json_serialize' stage."""
+    def dumps(self, obj, **kwargs):
+        with span("json_serialize"):
+            return super().dumps(obj, **kwargs)
+
+app.json_provider_class = TimedJSONProvider
+app.json = TimedJSONProvider(app)
+
+@app.before_request
+def _start_request_timer():
+    if metrics.is_enabled():
+        g.request_start = time.perf_counter()
+        metrics.begin_request()
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop("request_start", None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or "unknown"
+    metrics.observe("trend_http_request_duration_seconds", elapsed, endpoint=endpoint)
+    metrics.increment("trend_http_requests_total", endpoint=endpoint, status=response.status_code)
+    spans = metrics.end_request()
+    if TIMING_HEADERS:
+        response.headers["Server-Timing"] = metrics.server_timing_header(spans, total=elapsed)
+    return response
+
 #############################################
 # Helper Functions for Temporal Analysis
 #############################################
@@ -23,150 +71,604 @@ def parse_date(date_str):
         print(f"Error parsing date '{date_str}': {e}")
         return None
 
-def load_data_with_dates(filepath):
+def load_corpus_with_dates(filepath):
     """
-    Loads data from JSON and returns:
-      - documents: combined text (title + summary)
-      - timestamps: list of datetime objects parsed from the date field.
-    Assumes each entry includes a "date" field.
+    Streams the corpus and returns:
+      - preprocessed: one preprocessed document per entry
+      - timestamps: the parsed date of each entry, or None when it is missing/invalid.
     """
-    data = load_data(filepath)
-    documents = []
+    preprocessed = []
     timestamps = []
-    for entry in data:
-        title = entry.get("title", "").strip()
-        summary = entry.get("summary", "").strip()
-        date_str = entry.get("date", None)
-        if not date_str:
-            continue
-        dt = parse_date(date_str)
-        if dt is None:
-            continue
-        combined = title + ". " + summary
-        documents.append(combined)
-        timestamps.append(dt)
-    return documents, timestamps
+    for records in iter_batches(iter_records(filepath)):
+        preprocessed.extend(preprocess_documents(combine_fields(records)))
+        for entry in records:
+            date_str = entry.get("date", None)
+            timestamps.append(parse_date(date_str) if date_str else None)
+    return preprocessed, timestamps
 
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+embedding_cache = EmbeddingCache()
+
+@timed()
 def generate_embeddings(documents):
-    """Generates document embeddings using SentenceTransformer."""
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = embedding_model.encode(documents, show_progress_bar=False)
-    return embeddings
+    """
+    Generates document embeddings using SentenceTransformer.
+    Vectors for previously seen documents come from the on-disk embedding cache;
+    only the misses are encoded.
+    """
+    encode = get_executor(EMBEDDING_MODEL_NAME).encode
+    return encode_with_cache(documents, model_id(EMBEDDING_MODEL_NAME), encode, embedding_cache, verbose=True)
 
 #############################################
 # Preload Baseline Data for /topics and /documents Endpoints
 #############################################
 
-# Load and preprocess data once at startup
+# Pool workers started with "spawn" (see src/process_pools.py) re-import this script
+# as __mp_main__ when it is run directly; they need its functions, not the start-up.
+SERVER_PROCESS = __name__ != "__mp_main__"
+
+# Launch the embedding workers (EMBED_WORKERS > 1) while the process is still
+# single-threaded and has not run inference, so they can be forked safely
+if SERVER_PROCESS:
+    get_executor(EMBEDDING_MODEL_NAME).start()
+
 DATA_PATH = "data/summaries.json"
-data = load_data(DATA_PATH)
-documents = combine_fields(data)
-preprocessed_docs = preprocess_documents(documents)
-# Build BERTopic model on baseline data
-baseline_topic_model = BERTopic(verbose=True)
-baseline_embeddings = generate_embeddings(preprocessed_docs)
-baseline_topics, baseline_probs = baseline_topic_model.fit_transform(preprocessed_docs, baseline_embeddings)
-topics_summary = get_topic_summary(baseline_topic_model)
+SNAPSHOT_DIR = os.path.join("snapshots", "baseline")
+# Load the embedding model and the baseline (fitting it when no matching snapshot
+# exists) in a background thread, so the server can bind its port and answer
+# /api/health immediately.
+BASELINE_BACKGROUND_FIT = os.environ.get("BASELINE_BACKGROUND_FIT", "0") == "1"
+# Baseline embeddings are kept in the snapshot as a float16 (or "int8") memory-mapped
+# store, so every worker process shares one read-only copy through the page cache.
+EMBEDDING_STORE_DTYPE = os.environ.get("EMBEDDING_STORE_DTYPE", "float16")
+# Embed and cluster one representative per group of (near-)duplicate documents
+BASELINE_DEDUP = os.environ.get("BASELINE_DEDUP", "1") == "1"
+
+baseline_status = "loading"
+baseline_source = None
+baseline_error = None
+preprocessed_docs = None
+baseline_timestamps = None
+baseline_index = None
+baseline_topic_model = None
+baseline_store = None
+baseline_topics = None
+baseline_probs = None
+topics_summary = None
+document_table = None
+trend_index = None
+baseline_fingerprint = None
+baseline_data_hash = None
+
+def load_baseline():
+    """
+    Load the embedding model and preprocess the data, then restore the baseline
+    BERTopic model from the snapshot fitted on the same data (matched by content
+    hash). Falls back to fitting a new model, which is then saved as the snapshot
+    for the next start.
+    """
+    global baseline_status, baseline_source, baseline_error
+    global preprocessed_docs, baseline_timestamps, baseline_index, baseline_topic_model, baseline_store
+    global baseline_topics, baseline_probs, topics_summary, document_table, trend_index, baseline_fingerprint
+    global baseline_data_hash
+    try:
+        # Load the embedding model once per process, before the first request needs it
+        warm_up([EMBEDDING_MODEL_NAME])
+        docs, timestamps = load_corpus_with_dates(DATA_PATH)
+        index = InvertedIndex(docs)
+        data_hash = file_digest(DATA_PATH)
+        snapshot = load_snapshot(data_hash, SNAPSHOT_DIR)
+        if snapshot is not None:
+            topic_model, topics, probs = snapshot
+            source = "snapshot"
+        else:
+            # Build BERTopic model on baseline data
+            from bertopic import BERTopic
+            topic_model = BERTopic(verbose=True)
+            if BASELINE_DEDUP:
+                duplicates = deduplicate(docs)
+                print(f"Deduplication: {len(docs)} documents -> {len(duplicates.representatives)} representatives.")
+                embeddings = generate_embeddings(duplicates.select(docs))
+                with span("fit_transform"):
+                    topics, probs = topic_model.fit_transform(duplicates.select(docs), embeddings)
+                # Counts, assignments and stored embeddings cover every document again
+                topics, probs = expand_topic_model(topic_model, duplicates, topics, probs)
+                embeddings = duplicates.expand(embeddings)
+            else:
+                embeddings = generate_embeddings(docs)
+                with span("fit_transform"):
+                    topics, probs = topic_model.fit_transform(docs, embeddings)
+            save_snapshot(topic_model, topics, probs, data_hash, SNAPSHOT_DIR,
+                          embeddings=embeddings, embedding_model_name=model_id(EMBEDDING_MODEL_NAME),
+                          embedding_dtype=EMBEDDING_STORE_DTYPE, summary=get_topic_summary(topic_model))
+            source = "fit"
+        # Drop the transient float32 array in favour of the shared memmap (unless the
+        # snapshot was embedded with another backend than the one serving queries)
+        store = load_snapshot_embeddings(SNAPSHOT_DIR)
+        usable = store is not None and len(store) == len(docs) and store.model_name == model_id(EMBEDDING_MODEL_NAME)
+        if not usable:
+            store = None
+
+        preprocessed_docs, baseline_timestamps, baseline_index = docs, timestamps, index
+        baseline_topic_model, baseline_store = topic_model, store
+        baseline_topics, baseline_probs = topics, probs
+        topics_summary = get_topic_summary(topic_model)
+        document_table = DocumentTable(topic_model.get_document_info(docs), timestamps)
+        trend_index = TrendIndex(topics, timestamps, docs, topic_model)
+        baseline_fingerprint = model_fingerprint(os.path.join(SNAPSHOT_DIR, MODEL_DIRNAME))
+        baseline_data_hash = data_hash
+        baseline_source = source
+        baseline_status = "ready"
+        print(f"Baseline topic model ready (source: {source}).")
+    except Exception as e:
+        baseline_error = str(e)
+        baseline_status = "failed"
+        print(f"Error loading baseline topic model: {e}")
+        raise
+
+def baseline_not_ready():
+    """503 response used while the baseline model is loading (or failed to load)."""
+    return jsonify({"error": "Baseline topic model is not ready.", "status": baseline_status}), 503
+
+def requires_baseline(view):
+    """Respond 503 from `view` until the baseline model has been loaded."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if baseline_status != "ready":
+            return baseline_not_ready()
+        return view(*args, **kwargs)
+    return wrapper
+
+if not SERVER_PROCESS:
+    pass
+elif BASELINE_BACKGROUND_FIT:
+    threading.Thread(target=load_baseline, name="baseline-loader", daemon=True).start()
+else:
+    load_baseline()
+
+# Topics-over-time results per domain, keyed by (source, keywords, match mode, bin, baseline
+# data hash). The baseline documents are loaded once at startup, so results reflect the
+# data file as it was then; restart the server to pick up a changed data file.
+TOPICS_OVER_TIME_CACHE_SIZE = 32
+topics_over_time_cache = BoundedCache(TOPICS_OVER_TIME_CACHE_SIZE)
+
+#############################################
+# Per-domain Topic Models
+#############################################
+
+# Models fitted on one domain's documents, under a memory budget (DOMAIN_MODEL_MEMORY_MB)
+# with LRU eviction; evicted models are reloaded from cache/domain_models/.
+domain_models = DomainModelRegistry()
+
+def get_domain_model(keywords, mode="and", fresh=False):
+    """
+    BERTopic model fitted on the baseline documents matching the keywords only.
+    Built on the first request for a domain (concurrent requests share the build)
+    and served from the domain model registry afterwards, until the baseline data
+    changes; `fresh` fits a new model and replaces the registered one.
+    Returns None if no document matches.
+    """
+    ids = baseline_index.query(keywords, mode)
+    if not ids:
+        return None
+
+    def build():
+        docs = [preprocessed_docs[i] for i in ids]
+        if baseline_store is not None:
+            # rows() decodes the stored float16/int8 values back to float32 embeddings
+            embeddings = baseline_store.rows(ids)
+        else:
+            embeddings = generate_embeddings(docs)
+        from bertopic import BERTopic
+        topic_model = BERTopic(verbose=True)
+        with span("fit_transform"):
+            topics, probs = topic_model.fit_transform(docs, embeddings)
+        return DomainModel(topic_model, topics, probs, ids, get_topic_summary(topic_model))
+
+    key = ("app", ",".join(sorted({k.strip().lower() for k in keywords})), mode,
+           model_id(EMBEDDING_MODEL_NAME), baseline_data_hash)
+    return domain_models.get(key, build, refresh=fresh)
 
 #############################################
 # Flask API Endpoints
 #############################################
 
+@app.route("/api/health", methods=["GET"])
+def health():
+    """
+    GET endpoint for liveness checks. Answers as soon as the server is up and
+    reports whether the baseline model is loading, ready or failed.
+    """
+    return jsonify({"status": "ok", "baseline": baseline_status, "source": baseline_source, "error": baseline_error})
+
 @app.route("/api/topics", methods=["GET"])
+@requires_baseline
 def get_topics():
     """
     GET endpoint to retrieve the friendly topic summary.
-    Optionally, a 'domain' parameter can be provided to filter results.
-    (In this baseline version, we return precomputed topics.)
+    Optionally, a 'domain' parameter (comma-separated keywords, combined with
+    'match=all' or 'match=any') returns the topics of a model fitted on the matching
+    documents only; it is fitted on the first request and reused afterwards.
     """
-    domain = request.args.get("domain")
-    # For a real implementation, you might re-run the pipeline with filtering.
-    # Here we simply return the precomputed topics summary.
-    return jsonify(topics_summary)
+    keywords = parse_keywords(request.args.get("domain"))
+    if not keywords:
+        return jsonify(topics_summary)
+    mode = "or" if request.args.get("match", "all").lower() == "any" else "and"
+    try:
+        domain_model = get_domain_model(keywords, mode)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if domain_model is None:
+        return jsonify({"error": "No documents matched the domain filter."}), 404
+    return jsonify(domain_model.summary)
+
+DOCUMENTS_PAGE_SIZE = 100
+DOCUMENTS_MAX_PAGE_SIZE = 1000
 
 @app.route("/api/documents", methods=["GET"])
+@requires_baseline
 def get_documents():
     """
-    GET endpoint to retrieve document-level topic info.
+    GET endpoint to retrieve document-level topic info from the precomputed document table.
+    Query parameters:
+      - offset, limit: paging (limit defaults to 100, at most 1000)
+      - topic: only documents assigned to this topic id
+      - start, end: inclusive YYYY-MM-DD date range
+      - format=ndjson: stream all matching rows (or offset/limit of them) as NDJSON
     """
-    df_json = baseline_topic_model.get_document_info(preprocessed_docs).to_json(orient="records")
-    return jsonify({"documents": df_json})
+    try:
+        topic = request.args.get("topic", type=int)
+        start = request.args.get("start")
+        end = request.args.get("end")
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        ids = document_table.select(topic=topic, start=start, end=end)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    if request.args.get("format") == "ndjson":
+        limit = request.args.get("limit", type=int)
+        # Negative limits are clamped to 0 as for pages, rather than slicing from the end
+        ids = ids[offset:offset + max(limit, 0)] if limit is not None else ids[offset:]
+        return Response(document_table.iter_ndjson(ids), mimetype="application/x-ndjson")
+
+    limit = min(max(request.args.get("limit", DOCUMENTS_PAGE_SIZE, type=int), 0), DOCUMENTS_MAX_PAGE_SIZE)
+    return app.response_class(document_table.page_json(ids, offset, limit), mimetype="application/json")
+
+def parse_keywords(domain):
+    """Split a 'domain' query parameter into keywords ('healthcare,quantum' -> two keywords)."""
+    return [keyword for keyword in domain.split(",") if keyword.strip()] if domain else []
+
+def baseline_topics_over_time(keywords=None, mode="and", unit=None):
+    """
+    Compute topics over time from the fitted baseline model and its precomputed
+    topic assignments and timestamps, restricted to documents matching the
+    keywords. With a bin unit ('day', 'week' or 'month') timestamps are grouped into
+    calendar bins (weeks start on Monday), the same bins /api/trends reports,
+    instead of one bin per distinct timestamp.
+    Returns None if no dated document matches.
+    """
+    docs, timestamps, topics = [], [], []
+    matched = baseline_index.query(keywords or [], mode)
+    for i in matched:
+        if baseline_timestamps[i] is None:
+            continue
+        docs.append(preprocessed_docs[i])
+        timestamps.append(baseline_timestamps[i])
+        topics.append(baseline_topics[i])
+    if not docs:
+        return None
+    if unit:
+        timestamps = bin_start_timestamps(timestamps, unit)
+    with span("topics_over_time"):
+        tot = baseline_topic_model.topics_over_time(docs, timestamps, topics=topics)
+    return tot.to_dict(orient="records")
+
+def refit_topics_over_time(keywords=None, mode="and", unit=None, fresh=False):
+    """
+    Compute topics over time from a model fitted on the (optionally keyword-filtered)
+    documents only, served by the domain model registry (`fresh` fits a new one).
+    Otherwise takes the same arguments as baseline_topics_over_time and returns
+    None if no dated document matches.
+    """
+    domain_model = get_domain_model(keywords or [], mode, fresh)
+    if domain_model is None:
+        return None
+    docs, timestamps, topics = [], [], []
+    for i, topic in zip(domain_model.doc_ids, domain_model.topics):
+        if baseline_timestamps[i] is None:
+            continue
+        docs.append(preprocessed_docs[i])
+        timestamps.append(baseline_timestamps[i])
+        topics.append(topic)
+    if not docs:
+        return None
+    if unit:
+        timestamps = bin_start_timestamps(timestamps, unit)
+    with span("topics_over_time"):
+        tot = domain_model.topic_model.topics_over_time(docs, timestamps, topics=topics)
+    return tot.to_dict(orient="records")
 
 @app.route("/api/topics-over-time", methods=["GET"])
 def topics_over_time_endpoint():
     """
     GET endpoint to compute topics over time.
-    Accepts an optional 'domain' query parameter to filter documents.
+    Accepts an optional 'domain' query parameter to filter documents; several
+    comma-separated keywords are combined with 'match=all' (default) or 'match=any'.
+    'bin=day|week|month' groups timestamps into calendar bins, aligned with /api/trends.
+    Results come from the fitted baseline model and are cached per domain for the
+    data loaded at startup. Pass 'refit=true' to use a model fitted on the matching
+    documents only (fitted once per domain, then kept by the domain model registry),
+    and 'fresh=true' with it to fit a new model, bypassing both caches.
     Returns JSON data with temporal trends.
     """
     try:
-        # Load data with dates
-        documents_with_dates, timestamps = load_data_with_dates(DATA_PATH)
-        preprocessed = preprocess_documents(documents_with_dates)
-
-        # Optional: domain filtering via query parameter
-        domain = request.args.get("domain")
-        if domain:
-            filtered = [(doc, ts) for doc, ts in zip(preprocessed, timestamps) if domain.lower() in doc.lower()]
-            if not filtered:
-                return jsonify({"error": "No documents matched the domain filter."}), 404
-            preprocessed, timestamps = zip(*filtered)
-
-        if not preprocessed:
-            return jsonify({"error": "No valid documents available."}), 404
-
-        # Generate new embeddings for the (possibly filtered) documents
-        embeddings = generate_embeddings(preprocessed)
+        keywords = parse_keywords(request.args.get("domain"))
+        mode = "or" if request.args.get("match", "all").lower() == "any" else "and"
+        unit = request.args.get("bin")
+        if unit is not None and unit not in BIN_UNITS:
+            return jsonify({"error": f"'bin' must be one of: {', '.join(BIN_UNITS)}."}), 400
+        refit = request.args.get("refit", "").lower() in ("1", "true", "yes")
+        fresh = refit and request.args.get("fresh", "").lower() in ("1", "true", "yes")
+        if baseline_status != "ready":
+            return baseline_not_ready()
+
+        source = "domain" if refit else "baseline"
+        key = (source, tuple(k.strip().lower() for k in keywords), mode, unit, baseline_data_hash)
+        tot_dict = None if fresh else topics_over_time_cache.get(key)
+        if tot_dict is None:
+            if refit:
+                tot_dict = refit_topics_over_time(keywords, mode, unit, fresh)
+            else:
+                tot_dict = baseline_topics_over_time(keywords, mode, unit)
+            if tot_dict is None:
+                if keywords:
+                    return jsonify({"error": "No documents matched the domain filter."}), 404
+                return jsonify({"error": "No valid documents available."}), 404
+            topics_over_time_cache.put(key, tot_dict)
 
-        # Build a new BERTopic model on the fly
-        temp_topic_model = BERTopic(verbose=True)
-        topics, probs = temp_topic_model.fit_transform(preprocessed, embeddings)
-        
-        # Compute topics over time (returns a DataFrame)
-        tot = temp_topic_model.topics_over_time(preprocessed, timestamps)
-        
-        # Convert the DataFrame to a list of dictionaries
-        tot_dict = tot.to_dict(orient="records")
-        
         # Return the topics-over-time data as JSON
         return jsonify(tot_dict)
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/trends", methods=["GET"])
+@requires_baseline
+def trends():
+    """
+    GET endpoint returning per-topic document counts per time bin, computed from the
+    baseline topic assignments (no topics_over_time call, no refit).
+    Query parameters:
+      - bin: 'day', 'week' (default) or 'month'
+      - start, end: optional inclusive YYYY-MM-DD date range
+      - domain / match: optional keyword filter, as for /api/topics-over-time
+    Returns {"bin", "bins": [bin start dates], "topics": [topic ids], "counts": [[...] per bin]}.
+    """
+    unit = request.args.get("bin", "week")
+    if unit not in BIN_UNITS:
+        return jsonify({"error": f"'bin' must be one of: {', '.join(BIN_UNITS)}."}), 400
+    keywords = parse_keywords(request.args.get("domain"))
+    mode = "or" if request.args.get("match", "all").lower() == "any" else "and"
+    ids = baseline_index.query(keywords, mode) if keywords else None
+    try:
+        with span("trend_counts"):
+            result = trend_index.to_dict(unit, request.args.get("start"), request.args.get("end"), ids)
+    except ValueError:
+        return jsonify({"error": "Invalid date; expected YYYY-MM-DD."}), 400
+    return jsonify(result)
+
+@app.route("/api/trends/keywords", methods=["GET"])
+@requires_baseline
+def trend_keywords():
+    """
+    GET endpoint returning the c-TF-IDF keywords of each topic within one time bin.
+    Query parameters: 'date' (YYYY-MM-DD, any day inside the bin, required), 'bin'
+    ('day', 'week' or 'month', default 'week'), optional 'topic' and 'top_n'.
+    Keywords are computed on first request for a bin and cached.
+    """
+    unit = request.args.get("bin", "week")
+    if unit not in BIN_UNITS:
+        return jsonify({"error": f"'bin' must be one of: {', '.join(BIN_UNITS)}."}), 400
+    date = request.args.get("date")
+    if not date:
+        return jsonify({"error": "Missing 'date' parameter."}), 400
+    try:
+        with span("trend_keywords"):
+            keywords = trend_index.keywords(unit, date, request.args.get("topic", type=int),
+                                            request.args.get("top_n", 10, type=int))
+    except ValueError:
+        return jsonify({"error": "Invalid date; expected YYYY-MM-DD."}), 400
+    return jsonify({"bin": unit, "date": date, "keywords": {str(t): words for t, words in keywords.items()}})
+
 #############################################
 # New Endpoints for "Analyze" and "Visual"
 #############################################
 
-@app.route("/api/analyze", methods=["GET"])
+def run_analysis(report):
+    """
+    Full topic modeling run on the baseline data: load -> preprocess -> embed -> fit.
+    `report(stage, progress)` is called as each stage starts. Returns the topics summary.
+    """
+    report("preprocess", 0.0)
+    preprocessed_docs = load_preprocessed_documents(DATA_PATH)
+    report("embed", 0.2)
+    embeddings = generate_embeddings(preprocessed_docs)
+    report("fit", 0.5)
+    from bertopic import BERTopic
+    new_topic_model = BERTopic(verbose=True)
+    with span("fit_transform"):
+        new_topics, new_probs = new_topic_model.fit_transform(preprocessed_docs, embeddings)
+    report("summarize", 0.9)
+    return get_topic_summary(new_topic_model)
+
+# Background analysis jobs; identical in-flight requests share one job
+ANALYZE_WORKERS = int(os.environ.get("ANALYZE_WORKERS", "2"))
+analysis_jobs = JobManager(max_workers=ANALYZE_WORKERS, max_retained=50, ttl=3600)
+
+@app.route("/api/analyze", methods=["GET", "POST"])
 def analyze():
     """
-    /analyze endpoint: triggers a new topic modeling run on the baseline data.
-    Returns a fresh topics summary as JSON.
+    /analyze endpoint: starts a new topic modeling run on the baseline data in
+    the background and returns its job id (202). While a run on the same data is
+    still in flight, the existing job is returned instead of starting another.
+    Poll /api/jobs/<job_id> for progress and fetch /api/jobs/<job_id>/result when done.
     """
     try:
-        data = load_data(DATA_PATH)
-        documents = combine_fields(data)
-        preprocessed_docs = preprocess_documents(documents)
-        embeddings = generate_embeddings(preprocessed_docs)
-        new_topic_model = BERTopic(verbose=True)
-        new_topics, new_probs = new_topic_model.fit_transform(preprocessed_docs, embeddings)
-        fresh_summary = get_topic_summary(new_topic_model)
-        return jsonify(fresh_summary)
+        # run_analysis reads the data file afresh, so jobs are keyed on its current version
+        key = ("analyze", file_fingerprint(DATA_PATH))
+        job, created = analysis_jobs.submit(key, run_analysis)
+        body = job.to_dict()
+        body["deduplicated"] = not created
+        body["status_url"] = f"/api/jobs/{job.id}"
+        body["result_url"] = f"/api/jobs/{job.id}/result"
+        return jsonify(body), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Returns the status and progress of a background job."""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    """
+    Returns the result of a finished job (the fresh topics summary for /analyze).
+    Responds 202 with the job status while it is still running.
+    """
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    if job.status == FAILED:
+        return jsonify({"error": job.error}), 500
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 202
+    return jsonify(job.result)
+
+MAX_CLASSIFY_BATCH = 1000
+MAX_NEIGHBORS = 50
+baseline_ann_index = None
+_ann_index_lock = threading.Lock()
+
+def get_baseline_ann_index():
+    """
+    Approximate nearest-neighbour index over the baseline embeddings, built on first use.
+    It searches the snapshot's memmapped store in place (float16/int8, no float32 copy);
+    snapshots from before the embedding store existed fall back to the embedding cache.
+    """
+    global baseline_ann_index
+    with _ann_index_lock:
+        if baseline_ann_index is None:
+            # The raw matrix is fine here: the int8 store's uniform scale does not change cosine similarity
+            embeddings = baseline_store.matrix if baseline_store is not None else generate_embeddings(preprocessed_docs)
+            with span("ann_index_build"):
+                baseline_ann_index = AnnIndex(embeddings)
+        return baseline_ann_index
+
+@app.route("/api/classify", methods=["POST"])
+@requires_baseline
+def classify():
+    """
+    POST endpoint assigning new documents to the baseline topics.
+    Body: {"documents": [{"title": ..., "summary": ...}, ...], "neighbors": 5}
+    All documents are preprocessed and embedded as one batch. Each result carries the
+    topic, its label and the most similar baseline documents.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        entries = payload.get("documents")
+        if not isinstance(entries, list) or not entries:
+            return jsonify({"error": "Request body must contain a non-empty 'documents' list."}), 400
+        if len(entries) > MAX_CLASSIFY_BATCH:
+            return jsonify({"error": f"At most {MAX_CLASSIFY_BATCH} documents per request."}), 400
+        if not all(isinstance(entry, dict) for entry in entries):
+            return jsonify({"error": "Each document must be an object with 'title' and 'summary'."}), 400
+        if not all(isinstance(entry.get(field, ""), str) for entry in entries for field in ("title", "summary")):
+            return jsonify({"error": "'title' and 'summary' must be strings when given."}), 400
+        n_neighbors = payload.get("neighbors", 5)
+        if isinstance(n_neighbors, bool) or not isinstance(n_neighbors, int):
+            return jsonify({"error": "'neighbors' must be an integer."}), 400
+        n_neighbors = min(max(n_neighbors, 0), MAX_NEIGHBORS)
+
+        preprocessed = preprocess_documents(combine_fields(entries))
+        embeddings = generate_embeddings(preprocessed)
+        with span("transform"):
+            topics, probs = baseline_topic_model.transform(preprocessed, embeddings)
+        neighbor_ids, neighbor_scores = get_baseline_ann_index().search(embeddings, n_neighbors)
+
+        labels = {topic["topic_id"]: topic["label"] for topic in topics_summary}
+        results = []
+        for i, topic in enumerate(topics):
+            topic = int(topic)
+            probability = None
+            if probs is not None and getattr(probs, "ndim", 0) == 1:
+                probability = float(probs[i])
+            neighbors = [
+                {"document_id": int(doc_id), "topic_id": int(baseline_topics[doc_id]), "score": float(score)}
+                for doc_id, score in zip(neighbor_ids[i], neighbor_scores[i])
+                if doc_id >= 0
+            ]
+            results.append({
+                "topic_id": topic,
+                "label": labels.get(topic, "Unclassified/Miscellaneous"),
+                "probability": probability,
+                "neighbors": neighbors,
+            })
+        return jsonify({"results": results})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Returns pipeline stage timings, request latencies and counters in the
+    Prometheus text format. Enable collection with TREND_METRICS=1.
+    """
+    if not metrics.is_enabled():
+        body = "# metrics collection is disabled (set TREND_METRICS=1)\n"
+    else:
+        body = metrics.render_prometheus()
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/embedding-throughput", methods=["GET"])
+def embedding_throughput():
+    """
+    Returns the embedding executors' throughput (documents/sec overall and for the
+    last call), worker count and tuned batch size, for sizing nodes.
+    """
+    return jsonify(throughput_report())
+
+@app.route("/api/domain-models", methods=["GET"])
+def domain_models_endpoint():
+    """
+    Returns the per-domain models held in memory (least recently used first), their
+    memory use against the budget, and hit/reload/build/eviction counts.
+    """
+    return jsonify(domain_models.stats())
+
 @app.route("/api/visual", methods=["GET"])
 def serve_visual():
     """
-    Returns one of the visualization HTML files from the 'output' directory.
+    Returns one of the visualization HTML files.
+    Charts of the baseline model (topic_viz.html, bar_chart.html, hierarchy.html,
+    heatmap.html) are rendered on the first request and cached on disk against the
+    model fingerprint; any other file is served from the 'output' directory.
     Usage example:
       /api/visual?file=topics_over_time.html
     """
     try:
         # Get 'file' query parameter. Default could be 'topics_over_time.html'
         filename = request.args.get("file", "topics_over_time.html")
-        
+
+        if filename in CHARTS:
+            if baseline_status != "ready":
+                return baseline_not_ready()
+            path = render_chart(filename, baseline_fingerprint, topic_model=baseline_topic_model)
+            return send_from_directory(os.path.dirname(os.path.abspath(path)), filename)
+
         # Build the path to the output directory
         file_path = os.path.join("output", filename)
         
@@ -0,0 +1,218 @@
+"""
+File: TrendAnalysisAgent/eval/benchmark.py
+
+Stage-level benchmark of the topic pipeline on synthetic corpora.
+- Generates corpora with the same schema as dummy.py (title, summary, date) at
+  configurable scales, offline and deterministically.
+- Times load_data, combine_fields, preprocess_documents, embedding, UMAP, HDBSCAN,
+  get_topic_summary and topics_over_time separately, with peak traced memory.
+- Appends one JSON line per run to a results file so runs can be compared across commits.
+
+Usage:
+    python -m eval.benchmark --scales 1k 10k
+    python -m eval.benchmark --scales 100k --encoder all-MiniLM-L6-v2 --skip topics_over_time
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.preprocess import load_data, combine_fields, preprocess_documents
+from src.topic_model import get_topic_summary
+
+TOPICS = [
+    "Natural Language Processing", "Computer Vision", "Reinforcement Learning",
+    "Quantum Computing", "Healthcare AI", "Federated Learning", "Graph Neural Networks",
+    "Climate Modeling", "Anomaly Detection", "Generative Models", "Bias in AI",
+    "Multi-Agent Systems", "Edge Computing", "Sustainable AI", "Autonomous Vehicles"
+]
+
+# Vocabulary for filler text; each topic also gets its own keywords so clusters exist.
+FILLER_WORDS = (
+    "model data system method result approach network learning training analysis "
+    "performance framework task research study feature signal process design control "
+    "policy market report service energy sensor image graph agent robot vehicle patient "
+    "risk cost scale speed memory cloud device query search language vision audio"
+).split()
+
+DEFAULT_RESULTS_PATH = os.path.join("output", "benchmarks.jsonl")
+
+
+def parse_scale(text):
+    """'10k' -> 10000, '1M' -> 1000000, '500' -> 500."""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def _sentence(rng, words, n_words):
+    sentence = " ".join(rng.choice(words) for _ in range(n_words))
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def generate_corpus(path, n_docs, seed=42):
+    """Write `n_docs` synthetic entries (dummy.py schema) to `path` as a JSON array."""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    span_days = (date(2025, 1, 1) - start).days
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(n_docs):
+            topic = rng.choice(TOPICS)
+            words = FILLER_WORDS + topic.lower().split() * 3
+            entry = {
+                "title": f"{topic}: {_sentence(rng, words, 6).rstrip('.')}",
+                "summary": " ".join(_sentence(rng, words, rng.randint(6, 12)) for _ in range(4)),
+                "date": (start + timedelta(days=rng.randint(0, span_days))).isoformat(),
+            }
+            f.write(("  " if i == 0 else ",\n  ") + json.dumps(entry))
+        f.write("\n]\n")
+
+
+class HashingEncoder:
+    """Deterministic stub encoder: signed feature hashing of tokens, L2-normalized."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, documents, show_progress_bar=False, **kwargs):
+        embeddings = np.zeros((len(documents), self.dim), dtype=np.float32)
+        for i, doc in enumerate(documents):
+            for token in doc.split():
+                h = zlib.crc32(token.encode("utf-8"))
+                embeddings[i, h % self.dim] += 1.0 if h & (1 << 31) else -1.0
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+class StageTimer:
+    """Times named stages; optionally records peak traced memory per stage."""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    def run(self, name, fn, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        result = {"seconds": round(seconds, 4)}
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["peak_mb"] = round(peak / 2**20, 2)
+        self.results[name] = result
+        print(f"  {name:<22} {seconds:9.3f}s" + (f"  {result['peak_mb']:9.1f} MB" if self.trace_memory else ""))
+        return value
+
+
+def benchmark_scale(n_docs, encoder_name="hashing", min_cluster_size=10, skip=(), trace_memory=True, seed=42):
+    """Run the pipeline once on a synthetic corpus of `n_docs` documents; return the result record."""
+    import umap
+    import hdbscan
+    from bertopic import BERTopic
+    from bertopic.cluster import BaseCluster
+    from bertopic.dimensionality import BaseDimensionalityReduction
+
+    timer = StageTimer(trace_memory)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "summaries.json")
+        print(f"📦 Generating {n_docs} synthetic documents...")
+        generate_corpus(path, n_docs, seed=seed)
+
+        print(f"⏱️ Running pipeline on {n_docs} documents:")
+        data = timer.run("load_data", load_data, path)
+    timestamps = [entry["date"] for entry in data]
+    documents = timer.run("combine_fields", combine_fields, data)
+    del data
+    preprocessed_docs = timer.run("preprocess_documents", preprocess_documents, documents)
+    del documents
+
+    if encoder_name == "hashing":
+        encoder = HashingEncoder()
+    else:
+        from src.model_registry import get_embedding_model
+        encoder = get_embedding_model(encoder_name)
+    embeddings = timer.run("embedding", encoder.encode, preprocessed_docs, show_progress_bar=False)
+
+    umap_model = umap.UMAP(n_neighbors=15, n_components=2, min_dist=0.0, metric="cosine", random_state=42)
+    reduced = timer.run("umap", umap_model.fit_transform, embeddings)
+    hdbscan_model = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, min_samples=1, metric="euclidean")
+    labels = timer.run("hdbscan", hdbscan_model.fit_predict, reduced)
+
+    # Topic representations from the precomputed clusters (c-TF-IDF only, no refit)
+    topic_model = BERTopic(
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=BaseCluster(),
+    )
+    topics, _ = timer.run("topic_representation", topic_model.fit_transform, preprocessed_docs, reduced, y=labels)
+    summary = timer.run("get_topic_summary", get_topic_summary, topic_model)
+    if "topics_over_time" not in skip:
+        timer.run("topics_over_time", topic_model.topics_over_time, preprocessed_docs, timestamps, topics=topics)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "n_docs": n_docs,
+        "encoder": encoder_name,
+        "min_cluster_size": min_cluster_size,
+        "n_topics": len(summary),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": timer.results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stage-level benchmark of the topic pipeline.")
+    parser.add_argument("--scales", nargs="+", default=["1k", "10k"], help="corpus sizes, e.g. 1k 10k 100k 1M")
+    parser.add_argument("--encoder", default="hashing",
+                        help="'hashing' (deterministic stub) or a local SentenceTransformer name/path")
+    parser.add_argument("--min-cluster-size", type=int, default=10)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["topics_over_time"])
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (lower timing overhead)")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH, help="JSONL file the results are appended to")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    for scale in args.scales:
+        record = benchmark_scale(
+            parse_scale(scale),
+            encoder_name=args.encoder,
+            min_cluster_size=args.min_cluster_size,
+            skip=args.skip,
+            trace_memory=not args.no_memory,
+        )
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"✅ Results for {scale} appended to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
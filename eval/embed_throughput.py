@@ -0,0 +1,62 @@
+"""
+File: TrendAnalysisAgent/eval/embed_throughput.py
+
+Embedding throughput (documents/sec) of the CPU embedding executor for several
+worker counts, on a synthetic corpus (same generator as eval/benchmark.py).
+Use it to size nodes and to pick EMBED_WORKERS for a machine.
+
+Usage:
+    python -m eval.embed_throughput --docs 5k --workers 1 2 4
+    python -m eval.embed_throughput --model fine_tuned_model3 --workers 1 auto --batch-size 64
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from eval.benchmark import generate_corpus, parse_scale
+from src.embedding_executor import EmbeddingExecutor
+from src.preprocess import load_data, combine_fields, preprocess_documents
+
+
+def measure(documents, model_name, workers, batch_size=None):
+    """Throughput report of a fresh executor after one warm-up call (pool start, tuning)."""
+    executor = EmbeddingExecutor(model_name, workers, batch_size)
+    try:
+        executor.encode(documents)
+        executor.encode(documents)
+        return executor.report()
+    finally:
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure embedding throughput per worker count.")
+    parser.add_argument("--docs", default="5k", help="synthetic corpus size, e.g. 2k 10k")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformer name or local path")
+    parser.add_argument("--workers", nargs="+", default=["1", "auto"], help="worker counts to compare ('auto' = all cores)")
+    parser.add_argument("--batch-size", type=int, default=None, help="fixed batch size (default: auto-tuned)")
+    args = parser.parse_args(argv)
+
+    n_docs = parse_scale(args.docs)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "summaries.json")
+        print(f"📦 Generating {n_docs} synthetic documents...")
+        generate_corpus(path, n_docs)
+        documents = preprocess_documents(combine_fields(load_data(path)))
+
+    results = []
+    for workers in args.workers:
+        report = measure(documents, args.model, workers, args.batch_size)
+        last = report["last_call"]
+        print(f"⏱️ workers={report['workers']:<3} batch_size={last['batch_size']:<4} "
+              f"{last['docs_per_sec']:9.0f} docs/s ({last['seconds']:.2f}s for {last['documents']} docs)")
+        results.append(report)
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,201 @@
 # File: eval/evaluate_model.py
 
-from gensim.models.coherencemodel import CoherenceModel
-from gensim.corpora.dictionary import Dictionary
-import pickle
+"""
+Evaluation engine for fitted BERTopic models.
+- The corpus is tokenized once per run.
+- The gensim Dictionary and the co-occurrence statistics (probability
+  accumulators) for each coherence measure are persisted under cache/eval/
+  and reused across runs and across models.
+- Coherence statistics are estimated with multiple processes.
+- Several saved models can be scored against the same statistics in one invocation:
+
+    python -m eval.evaluate_model bertopic_model other_model --measures c_v u_mass c_npmi
+"""
+
+import argparse
+import hashlib
+import json
 import os
-from src.preprocess import load_data, combine_fields, preprocess_documents
+import pickle
 
+from src.preprocess import load_preprocessed_documents
 
-def calculate_coherence(topic_model, documents, top_n=10):
-    topic_words = [
-        [word for word, _ in topic_model.get_topic(t)[:top_n]]
-        for t in topic_model.get_topics().keys()
-        if topic_model.get_topic(t) is not False
-    ]
-    dictionary = Dictionary([doc.split() for doc in documents])
-    corpus = [dictionary.doc2bow(doc.split()) for doc in documents]
+EVAL_CACHE_DIR = os.path.join("cache", "eval")
+DEFAULT_MEASURES = ["c_v"]
 
-    coherence_model = CoherenceModel(
-        topics=topic_words,
-        texts=[doc.split() for doc in documents],
-        dictionary=dictionary,
-        coherence='c_v'
-    )
-    return coherence_model.get_coherence()
 
+def get_topic_words(topic_model, top_n=10):
+    """Top words of every topic, calling get_topic once per topic."""
+    topic_words = []
+    for topic_id in topic_model.get_topics().keys():
+        words = topic_model.get_topic(topic_id)
+        if words is not False:
+            topic_words.append([word for word, _ in words[:top_n]])
+    return topic_words
 
-def calculate_diversity(topic_model, top_k=10):
+
+def topic_diversity(topic_words):
+    """Share of unique words among all topics' top words."""
     seen = set()
     total = 0
-    for topic_id in topic_model.get_topics().keys():
-        words = [word for word, _ in topic_model.get_topic(topic_id)[:top_k]]
+    for words in topic_words:
         seen.update(words)
         total += len(words)
     return len(seen) / total if total > 0 else 0
 
 
-def main():
+class EvaluationEngine:
+    """
+    Coherence scoring against one tokenized corpus. Per-measure co-occurrence
+    statistics are estimated once for the union of all topics being scored and
+    shared by every model; with `persist=True` they are also cached on disk.
+    """
+
+    def __init__(self, documents, cache_dir=EVAL_CACHE_DIR, processes=-1, persist=True):
+        self.texts = [doc.split() for doc in documents]
+        self.processes = processes
+        self.persist = persist
+        self.cache_dir = os.path.join(cache_dir, self._corpus_hash(documents)[:16])
+        self.dictionary = self._load_dictionary()
+
+    @staticmethod
+    def _corpus_hash(documents):
+        h = hashlib.sha256()
+        for doc in documents:
+            h.update(doc.encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    def _load_dictionary(self):
+        from gensim.corpora.dictionary import Dictionary
+
+        path = os.path.join(self.cache_dir, "dictionary.gensim")
+        if self.persist and os.path.exists(path):
+            return Dictionary.load(path)
+        dictionary = Dictionary(self.texts)
+        if self.persist:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            dictionary.save(path)
+        return dictionary
+
+    def _known_words(self, topics):
+        """Drop words the dictionary does not know (e.g. BERTopic's empty padding) and empty topics."""
+        token2id = self.dictionary.token2id
+        topics = [[word for word in words if word in token2id] for words in topics]
+        return [words for words in topics if words]
+
+    def _accumulator_path(self, measure):
+        return os.path.join(self.cache_dir, f"accumulator_{measure}.pkl")
+
+    def _coherence_model(self, measure, topics):
+        """CoherenceModel for `topics` whose statistics come from the disk cache when they cover them."""
+        from gensim.models.coherencemodel import CoherenceModel
+        from gensim.topic_coherence.probability_estimation import unique_ids_from_segments
+
+        coherence_model = CoherenceModel(
+            topics=topics,
+            texts=self.texts,
+            dictionary=self.dictionary,
+            coherence=measure,
+            processes=self.processes,
+        )
+        path = self._accumulator_path(measure)
+        needed_ids = unique_ids_from_segments(coherence_model.measure.seg(coherence_model.topics))
+        if self.persist and os.path.exists(path):
+            with open(path, "rb") as f:
+                accumulator = pickle.load(f)
+            if accumulator.relevant_ids.issuperset(needed_ids):
+                coherence_model._accumulator = accumulator
+                return coherence_model
+
+        accumulator = coherence_model.estimate_probabilities()
+        if self.persist:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(accumulator, f)
+            os.replace(tmp_path, path)
+        return coherence_model
+
+    def coherence(self, topic_sets, measure="c_v"):
+        """
+        Coherence of each set of topics (a list of top-word lists per model),
+        all scored against one shared set of co-occurrence statistics.
+        """
+        topic_sets = [self._known_words(topics) for topics in topic_sets]
+        union = [words for topics in topic_sets for words in topics]
+        if not union:
+            return [None for _ in topic_sets]
+        coherence_model = self._coherence_model(measure, union)
+        scores = []
+        for topics in topic_sets:
+            if not topics:
+                scores.append(None)
+                continue
+            # The accumulator covers the union, so gensim keeps it for each subset
+            coherence_model.topics = topics
+            scores.append(coherence_model.get_coherence())
+        return scores
+
+    def evaluate(self, topic_models, measures=DEFAULT_MEASURES, top_n=10):
+        """Score {name: topic_model} on every measure plus topic diversity."""
+        names = list(topic_models)
+        topic_sets = [get_topic_words(topic_models[name], top_n) for name in names]
+        results = {name: {"diversity": topic_diversity(topics)} for name, topics in zip(names, topic_sets)}
+        for measure in measures:
+            for name, score in zip(names, self.coherence(topic_sets, measure)):
+                results[name][measure] = score
+        return results
+
+
+def calculate_coherence(topic_model, documents, top_n=10, coherence='c_v', engine=None):
+    if engine is None:
+        engine = EvaluationEngine(documents, persist=False)
+    return engine.coherence([get_topic_words(topic_model, top_n)], coherence)[0]
+
+
+def calculate_diversity(topic_model, top_k=10):
+    return topic_diversity(get_topic_words(topic_model, top_k))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate saved BERTopic models.")
+    parser.add_argument("models", nargs="*", default=["bertopic_model"],
+                        help="paths of models saved with topic_model.save()")
+    parser.add_argument("--data", default=os.path.join("data", "summaries.json"))
+    parser.add_argument("--measures", nargs="+", default=DEFAULT_MEASURES,
+                        choices=["c_v", "u_mass", "c_uci", "c_npmi"])
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=-1, help="processes for co-occurrence counting")
+    parser.add_argument("--output", default=None, help="optional JSON file for the scores")
+    args = parser.parse_args(argv)
+
     print("🔍 Evaluating Topic Model...")
 
     # Load preprocessed documents
-    data_path = os.path.join("data", "summaries.json")
-    model_path = "bertopic_model"  # folder saved with topic_model.save()
-
-    data = load_data(data_path)
-    docs = combine_fields(data)
-    preprocessed_docs = preprocess_documents(docs)
+    preprocessed_docs = load_preprocessed_documents(args.data)
 
     if not preprocessed_docs:
         print("No documents found.")
         return
 
-    # Load the saved BERTopic model
+    # Load the saved BERTopic models
     from bertopic import BERTopic
-    topic_model = BERTopic.load(model_path)
+    topic_models = {path: BERTopic.load(path) for path in args.models}
 
     # Calculate metrics
-    coherence = calculate_coherence(topic_model, preprocessed_docs)
-    diversity = calculate_diversity(topic_model)
-
-    print(f"📊 Coherence Score (c_v): {coherence:.4f}")
-    print(f"🧠 Topic Diversity Score: {diversity:.4f}")
+    engine = EvaluationEngine(preprocessed_docs, processes=args.processes)
+    results = engine.evaluate(topic_models, measures=args.measures, top_n=args.top_n)
+
+    for name, scores in results.items():
+        print(f"📦 {name}")
+        for measure in args.measures:
+            score = scores[measure]
+            print(f"  📊 Coherence Score ({measure}): " + (f"{score:.4f}" if score is not None else "n/a"))
+        print(f"  🧠 Topic Diversity Score: {scores['diversity']:.4f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
 
 
 if __name__ == "__main__":
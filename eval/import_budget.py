@@ -0,0 +1,96 @@
+"""
+File: TrendAnalysisAgent/eval/import_budget.py
+
+Import-time budget check for the lightweight modules.
+Each module is imported cold in a fresh interpreter (best of several runs) and the
+check fails when the import takes longer than its budget, or when it drags in one
+of the heavy dependencies that must only be loaded on first use.
+
+The same check runs under pytest as tests/test_import_budget.py.
+
+Usage:
+    python -m eval.import_budget
+    python -m eval.import_budget --budget src.preprocess=0.2 --runs 5
+Exits with status 1 when a budget is exceeded.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Cold-import budgets in seconds
+DEFAULT_BUDGETS = {
+    "src.preprocess": 0.3,
+    "src.topic_model": 0.6,
+}
+# Must not be imported as a side effect of importing the modules above
+HEAVY_MODULES = [
+    "bertopic", "umap", "hdbscan", "sentence_transformers", "torch",
+    "sklearn", "gensim", "matplotlib", "pandas", "scipy",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module, runs=3):
+    """
+    Best cold-import time of `module` over `runs` fresh interpreters, plus the heavy
+    modules it loaded. Raises ImportError if the module cannot be imported.
+    """
+    best, heavy = None, []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines()
+            raise ImportError(lines[-1] if lines else f"importing {module} failed")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        best = result["seconds"] if best is None else min(best, result["seconds"])
+        heavy = result["heavy"]
+    return best, heavy
+
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values or []:
+        module, _, seconds = value.partition("=")
+        budgets[module] = float(seconds)
+    return budgets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold import time of the lightweight modules.")
+    parser.add_argument("--budget", action="append", metavar="MODULE=SECONDS",
+                        help="override or add a budget (repeatable)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module (best time is used)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, budget in parse_budgets(args.budget).items():
+        try:
+            seconds, heavy = measure(module, args.runs)
+        except ImportError as e:
+            failed = True
+            print(f"❌ {module}: {e}")
+            continue
+        ok = seconds <= budget and not heavy
+        failed |= not ok
+        status = "✅" if ok else "❌"
+        print(f"{status} {module}: {seconds * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+        if heavy:
+            print(f"   heavy dependencies imported eagerly: {', '.join(heavy)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+File: TrendAnalysisAgent/eval/sweep.py
+
+Hyperparameter sweep over the UMAP/HDBSCAN settings of build_topic_model.
+- Embeddings are computed once (through the embedding cache).
+- Each UMAP configuration is reduced once and the projection is cached on disk.
+- HDBSCAN configurations run in parallel across processes on the cached projection,
+  and each result is scored with the metrics in eval/evaluate_model.py.
+
+Usage:
+    python -m eval.sweep --min-cluster-sizes 5 10 15 20 --min-samples 1 5 --n-neighbors 15 30
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.preprocess import load_preprocessed_documents
+from src.topic_model import FINE_TUNED_MODEL_PATH, UMAP_PARAMS, HDBSCAN_PARAMS, embed_documents
+from eval.evaluate_model import EvaluationEngine, calculate_coherence, calculate_diversity
+
+UMAP_CACHE_DIR = os.path.join("cache", "umap")
+DEFAULT_RESULTS_PATH = os.path.join("output", "sweep_results.json")
+
+# Per-process state for the HDBSCAN workers, set once by _init_worker
+_worker_documents = None
+_worker_reduced = None
+_worker_engine = None
+
+
+def _umap_cache_path(embeddings, umap_params, cache_dir):
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    h.update(json.dumps(umap_params, sort_keys=True).encode("utf-8"))
+    return os.path.join(cache_dir, h.hexdigest() + ".npy")
+
+
+def reduce_embeddings(embeddings, umap_params, cache_dir=UMAP_CACHE_DIR):
+    """UMAP projection of `embeddings` for one configuration, cached on disk."""
+    path = _umap_cache_path(embeddings, umap_params, cache_dir)
+    if os.path.exists(path):
+        print(f"♻️ Reusing cached UMAP projection for {umap_params}")
+        return np.load(path)
+    import umap
+
+    print(f"🗺️ Running UMAP with {umap_params}...")
+    reduced = umap.UMAP(**umap_params).fit_transform(embeddings)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, reduced)
+    return reduced
+
+
+def _init_worker(documents, reduced):
+    global _worker_documents, _worker_reduced, _worker_engine
+    _worker_documents = documents
+    _worker_reduced = reduced
+    # Tokenize once per worker; the coherence statistics are not persisted from workers
+    _worker_engine = EvaluationEngine(documents, processes=1, persist=False)
+
+
+def _evaluate_config(hdbscan_params):
+    """Cluster the shared projection with one HDBSCAN configuration and score the topics."""
+    import hdbscan
+    from bertopic import BERTopic
+    from bertopic.cluster import BaseCluster
+    from bertopic.dimensionality import BaseDimensionalityReduction
+
+    start = time.perf_counter()
+    labels = hdbscan.HDBSCAN(**hdbscan_params).fit_predict(_worker_reduced)
+    # Build topic representations from the precomputed clusters without refitting UMAP/HDBSCAN
+    topic_model = BERTopic(umap_model=BaseDimensionalityReduction(), hdbscan_model=BaseCluster())
+    topic_model.fit_transform(_worker_documents, _worker_reduced, y=labels)
+    n_topics = len(set(labels) - {-1})
+    return {
+        "hdbscan": hdbscan_params,
+        "n_topics": n_topics,
+        "outlier_fraction": float(np.mean(labels == -1)),
+        "coherence_c_v": calculate_coherence(topic_model, _worker_documents, engine=_worker_engine) if n_topics else None,
+        "diversity": calculate_diversity(topic_model),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_sweep(documents, embeddings, umap_grid, hdbscan_grid, workers=None, cache_dir=UMAP_CACHE_DIR):
+    """
+    Evaluate every (UMAP config, HDBSCAN config) pair. Each UMAP projection is computed
+    (or loaded) once and shared by a process pool that runs the HDBSCAN configs.
+    Returns one result dict per pair, best c_v coherence first.
+    """
+    results = []
+    for umap_params in umap_grid:
+        reduced = reduce_embeddings(embeddings, umap_params, cache_dir)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(documents, reduced)) as pool:
+            for result in pool.map(_evaluate_config, hdbscan_grid):
+                result["umap"] = umap_params
+                results.append(result)
+                print(f"  {result['hdbscan']} -> {result['n_topics']} topics, "
+                      f"c_v={result['coherence_c_v']}, diversity={result['diversity']:.4f}")
+    results.sort(key=lambda r: r["coherence_c_v"] if r["coherence_c_v"] is not None else float("-inf"),
+                 reverse=True)
+    return results
+
+
+def build_grid(defaults, **options):
+    """Cartesian product of the given option lists on top of `defaults`."""
+    names = [name for name, values in options.items() if values]
+    combos = itertools.product(*(options[name] for name in names))
+    return [{**defaults, **dict(zip(names, combo))} for combo in combos]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UMAP/HDBSCAN hyperparameter sweep.")
+    parser.add_argument("--data", default=os.path.join("data", "summaries.json"))
+    parser.add_argument("--model", default=FINE_TUNED_MODEL_PATH, help="embedding model name or path")
+    parser.add_argument("--n-neighbors", type=int, nargs="*")
+    parser.add_argument("--n-components", type=int, nargs="*")
+    parser.add_argument("--min-cluster-sizes", type=int, nargs="*", default=[5, 10, 15, 20])
+    parser.add_argument("--min-samples", type=int, nargs="*")
+    parser.add_argument("--workers", type=int, default=None, help="HDBSCAN worker processes (default: all cores)")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    print("📦 Loading and preprocessing data...")
+    documents = [doc for doc in load_preprocessed_documents(args.data) if doc.strip()]
+    if not documents:
+        print("No documents found.")
+        return
+
+    print("🤖 Generating embeddings...")
+    embeddings = embed_documents(documents, args.model, show_progress_bar=True)
+
+    umap_grid = build_grid(UMAP_PARAMS, n_neighbors=args.n_neighbors, n_components=args.n_components)
+    # prediction_data is only needed for transform(); skip the extra work during the sweep
+    hdbscan_grid = build_grid(
+        {**HDBSCAN_PARAMS, "prediction_data": False},
+        min_cluster_size=args.min_cluster_sizes,
+        min_samples=args.min_samples,
+    )
+    print(f"🔁 Sweeping {len(umap_grid)} UMAP x {len(hdbscan_grid)} HDBSCAN configurations...")
+    results = run_sweep(documents, embeddings, umap_grid, hdbscan_grid, workers=args.workers)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    best = results[0]
+    print(f"🏆 Best: UMAP {best['umap']} / HDBSCAN {best['hdbscan']} (c_v={best['coherence_c_v']})")
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
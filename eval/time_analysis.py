@@ -4,8 +4,10 @@ File: TrendAnalysisAgent/eval/time_analysis.py
 Performs temporal topic modeling using BERTopic's topics_over_time.
 Includes:
 - Date parsing from JSON entries.
-- Manual embedding generation with SentenceTransformer.
-- Interactive and static visualizations of topic evolution.
+- Manual embedding generation with SentenceTransformer, persisted in a memory-mapped
+  float16 embedding store (cache/embeddings/) so later runs only encode new documents.
+- Interactive and static visualizations of topic evolution, binned per day/week/month
+  (per-bin counts come from src/trends.py instead of a pandas pivot).
 - (Optional) A stub for enhanced topic labeling using KeyBERT.
 """
 
@@ -13,11 +15,16 @@ import os
 import json
 from datetime import datetime
 import pandas as pd
-import matplotlib.pyplot as plt
-from sentence_transformers import SentenceTransformer
-from bertopic import BERTopic
 
-from src.preprocess import load_data, combine_fields, preprocess_documents
+from src.preprocess import iter_records, preprocess_documents
+from src.embedding_store import EmbeddingStore, embed_into_store
+from src.model_registry import get_embedding_model, model_id
+from src.embedding_executor import get_executor
+from src.inverted_index import InvertedIndex
+from src.trends import TrendIndex, bin_start_timestamps
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_STORE_PATH = os.path.join("cache", "embeddings", model_id(EMBEDDING_MODEL_NAME).replace("/", "_") + ".store")
 
 
 def parse_date(date_str):
@@ -34,12 +41,11 @@ def load_data_with_dates(filepath):
     Loads data from JSON and returns:
       - documents: combined text (title + summary)
       - timestamps: list of datetime objects parsed from the date field.
-    Assumes each entry includes a "date" field.
+    Assumes each entry includes a "date" field. Entries are streamed from disk.
     """
-    data = load_data(filepath)
     documents = []
     timestamps = []
-    for entry in data:
+    for entry in iter_records(filepath):
         title = entry.get("title", "").strip()
         summary = entry.get("summary", "").strip()
         date_str = entry.get("date", None)
@@ -54,7 +60,7 @@ def load_data_with_dates(filepath):
     return documents, timestamps
 
 
-def run_temporal_analysis(domain_filter=None):
+def run_temporal_analysis(domain_filter=None, bin_unit="week"):
     print("📦 Loading and preprocessing data...")
     data_path = os.path.join("data", "summaries.json")
     documents, timestamps = load_data_with_dates(data_path)
@@ -62,28 +68,41 @@ def run_temporal_analysis(domain_filter=None):
     
     # Optional: Filter by a domain keyword if provided (timestamps remain as-is)
     if domain_filter:
-        filtered = [(doc, ts) for doc, ts in zip(preprocessed_docs, timestamps) if domain_filter.lower() in doc.lower()]
-        if not filtered:
+        matched = InvertedIndex(preprocessed_docs).query(domain_filter)
+        if not matched:
             print("❌ No documents matched the domain filter.")
             return
-        preprocessed_docs, timestamps = zip(*filtered)
+        preprocessed_docs = [preprocessed_docs[i] for i in matched]
+        timestamps = [timestamps[i] for i in matched]
     
     if not preprocessed_docs:
         print("❌ No valid documents after filtering.")
         return
 
     print("🤖 Generating embeddings...")
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = embedding_model.encode(preprocessed_docs, show_progress_bar=True)
+    embedding_model = get_embedding_model(EMBEDDING_MODEL_NAME)
+    store = EmbeddingStore.open_or_create(
+        EMBEDDING_STORE_PATH, model_id(EMBEDDING_MODEL_NAME), embedding_model.get_sentence_embedding_dimension()
+    )
+    n_stored = len(store)
+
+    executor = get_executor(EMBEDDING_MODEL_NAME)
+    offsets = embed_into_store(store, preprocessed_docs, lambda texts: executor.encode(texts, verbose=True))
+    print(f"Embedding store: {len(store) - n_stored} new, {len(store)} total ({EMBEDDING_STORE_PATH}).")
+    embeddings = store.rows(offsets)
 
     print("🧠 Building BERTopic model...")
+    from bertopic import BERTopic
     # Build the model using the generated embeddings (do not pass timestamps here)
     topic_model = BERTopic(verbose=True)
     topics, probs = topic_model.fit_transform(preprocessed_docs, embeddings)
 
     print("📈 Computing topics over time...")
-    # Call topics_over_time without the 'time_bin_size' parameter.
-    topics_over_time = topic_model.topics_over_time(preprocessed_docs, timestamps)
+    trend_index = TrendIndex(topics, timestamps)
+    # One bin per calendar day/week/month (the TrendIndex bins) instead of one per distinct timestamp
+    topics_over_time = topic_model.topics_over_time(
+        preprocessed_docs, bin_start_timestamps(timestamps, bin_unit), topics=topics
+    )
     
     print("📊 Saving interactive visualization...")
     fig = topic_model.visualize_topics_over_time(topics_over_time)
@@ -92,12 +111,11 @@ def run_temporal_analysis(domain_filter=None):
 
     # Optionally, plot a static line chart using pandas/matplotlib:
     try:
-        df = pd.DataFrame(topics_over_time)
-        df["Time"] = pd.to_datetime(df["Time"])
-        df.set_index("Time", inplace=True)
-        # Pivot data so that each topic gets its own column for document counts.
-        df_grouped = df.pivot_table(index="Time", columns="Topic", values="Count", fill_value=0)
-        df_grouped.plot(figsize=(10, 6), title="Topic Prevalence Over Time")
+        import matplotlib.pyplot as plt
+        bin_starts, topic_ids, counts = trend_index.counts(bin_unit)
+        # Each topic gets its own column of document counts per bin.
+        df_grouped = pd.DataFrame(counts, index=pd.to_datetime(bin_starts), columns=topic_ids)
+        df_grouped.plot(figsize=(10, 6), title=f"Topic Prevalence Over Time (per {bin_unit})")
         plt.xlabel("Time")
         plt.ylabel("Document Count")
         plt.tight_layout()
@@ -0,0 +1,123 @@
+"""
+File: TrendAnalysisAgent/eval/validate_onnx.py
+
+Validates the int8 ONNX embedding backend against the original PyTorch model
+before switching EMBEDDING_BACKEND=onnx on:
+- Cosine agreement: per-document cosine similarity between the two embeddings
+  (mean, 1st percentile and minimum).
+- Topic assignment overlap: a BERTopic model is fitted on the PyTorch embeddings,
+  then every document is assigned with transform() using each backend's embeddings;
+  the overlap is the share of documents that keep their topic.
+- Speedup: documents/sec of each backend through the embedding executor.
+
+Usage:
+    python -m eval.validate_onnx
+    python -m eval.validate_onnx --model all-MiniLM-L6-v2 --limit 2000 --min-cosine 0.99
+Exits with status 1 when the agreement is below the thresholds.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from src.embedding_executor import EmbeddingExecutor
+from src.preprocess import iter_records, combine_fields, preprocess_documents
+from src.topic_model import FINE_TUNED_MODEL_PATH, UMAP_PARAMS, HDBSCAN_PARAMS
+
+DATA_PATH = os.path.join("data", "summaries.json")
+DEFAULT_RESULTS_PATH = os.path.join("output", "onnx_validation.jsonl")
+DEFAULT_MIN_COSINE = 0.98
+DEFAULT_MIN_TOPIC_OVERLAP = 0.9
+
+
+def load_documents(path=DATA_PATH, limit=None):
+    records = []
+    for entry in iter_records(path):
+        records.append(entry)
+        if limit and len(records) >= limit:
+            break
+    return preprocess_documents(combine_fields(records))
+
+
+def embed(documents, model_name, backend):
+    """(embeddings, docs/sec) after a warm-up call, so model loading and export are not timed."""
+    executor = EmbeddingExecutor(model_name, workers=1, backend=backend)
+    try:
+        executor.encode(documents[:64])
+        embeddings = executor.encode(documents)
+        return embeddings, executor.last_call["docs_per_sec"]
+    finally:
+        executor.shutdown()
+
+
+def cosine_agreement(reference, candidate):
+    """Per-row cosine similarity between two embedding matrices."""
+    reference = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+    candidate = candidate / np.maximum(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12)
+    return np.sum(reference * candidate, axis=1)
+
+
+def topic_overlap(documents, reference, candidate):
+    """Share of documents assigned the same topic with either set of embeddings."""
+    import hdbscan
+    import umap
+    from bertopic import BERTopic
+
+    topic_model = BERTopic(umap_model=umap.UMAP(**UMAP_PARAMS), hdbscan_model=hdbscan.HDBSCAN(**HDBSCAN_PARAMS))
+    topic_model.fit(documents, reference)
+    reference_topics, _ = topic_model.transform(documents, reference)
+    candidate_topics, _ = topic_model.transform(documents, candidate)
+    return float(np.mean(np.asarray(reference_topics) == np.asarray(candidate_topics)))
+
+
+def validate(documents, model_name=FINE_TUNED_MODEL_PATH):
+    print(f"⏱️ Embedding {len(documents)} documents with the PyTorch model...")
+    reference, torch_rate = embed(documents, model_name, "torch")
+    print(f"⏱️ Embedding {len(documents)} documents with the int8 ONNX model...")
+    candidate, onnx_rate = embed(documents, model_name, "onnx")
+    cosines = cosine_agreement(reference, candidate)
+    print("📊 Fitting BERTopic on the PyTorch embeddings and comparing assignments...")
+    return {
+        "model": model_name,
+        "n_docs": len(documents),
+        "cosine_mean": float(cosines.mean()),
+        "cosine_p1": float(np.percentile(cosines, 1)),
+        "cosine_min": float(cosines.min()),
+        "topic_overlap": topic_overlap(documents, reference, candidate),
+        "torch_docs_per_sec": round(torch_rate, 1),
+        "onnx_docs_per_sec": round(onnx_rate, 1),
+        "speedup": round(onnx_rate / torch_rate, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the int8 ONNX embedding backend with the PyTorch model.")
+    parser.add_argument("--model", default=FINE_TUNED_MODEL_PATH, help="SentenceTransformer name or local path")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--limit", type=int, default=None, help="validate on the first N documents only")
+    parser.add_argument("--min-cosine", type=float, default=DEFAULT_MIN_COSINE, help="required mean cosine agreement")
+    parser.add_argument("--min-topic-overlap", type=float, default=DEFAULT_MIN_TOPIC_OVERLAP)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH, help="JSONL file the results are appended to")
+    args = parser.parse_args(argv)
+
+    result = validate(load_documents(args.data, args.limit), args.model)
+    ok = result["cosine_mean"] >= args.min_cosine and result["topic_overlap"] >= args.min_topic_overlap
+    result["accepted"] = ok
+    print(f"  cosine agreement  mean {result['cosine_mean']:.4f}  p1 {result['cosine_p1']:.4f}  "
+          f"min {result['cosine_min']:.4f}  (required mean {args.min_cosine})")
+    print(f"  topic overlap     {result['topic_overlap'] * 100:.1f}%  (required {args.min_topic_overlap * 100:.0f}%)")
+    print(f"  throughput        {result['torch_docs_per_sec']:.0f} -> {result['onnx_docs_per_sec']:.0f} docs/s "
+          f"({result['speedup']}x)")
+    print("✅ ONNX backend accepted." if ok else "❌ ONNX backend disagrees with the PyTorch model.")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
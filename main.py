@@ -47,26 +47,56 @@
 
 # File: TrendAnalysisAgent/main.py
 
+import argparse
+import itertools
 import os
-import pandas as pd
-from src.preprocess import load_data, combine_fields, preprocess_documents
-from src.topic_model import build_topic_model, print_topic_info, visualize_topics_interactive, get_topic_summary
+import re
+from src.preprocess import load_preprocessed_documents, iter_records, iter_batches, combine_fields, preprocess_documents
+from src.topic_model import FINE_TUNED_MODEL_PATH, build_topic_model, print_topic_info, get_topic_summary, embed_documents
+from src.inverted_index import InvertedIndex
+from src.cache_utils import file_digest
+from src.domain_models import DomainModel, DomainModelRegistry
+from src.model_registry import model_id
+from src.incremental import init_state, update_topic_model, save_state, load_state
+from src.visuals import render_all
 
-def filter_by_domain(documents, domain_keyword=None):
+DATA_PATH = "data/summaries.json"
+MODEL_PATH = "bertopic_model"
+
+def model_path_for(domain=None):
+    """
+    Where a fitted model is saved: MODEL_PATH for the full corpus, a separate
+    per-domain path for --domain fits, so a domain model never replaces the
+    full-corpus model that --update folds new entries into.
+    """
+    if not domain:
+        return MODEL_PATH
+    slug = re.sub(r"[^a-z0-9]+", "_", domain.strip().lower()).strip("_") or "domain"
+    return f"{MODEL_PATH}_{slug}"
+
+def fit_domain_model(documents, domain):
     """
-    Optionally filter documents by a keyword in the text.
-    If domain_keyword is None, return all documents.
+    Topic model for the documents matching `domain`. Models are kept per domain and
+    data version in cache/domain_models/, so running the same domain again on
+    unchanged data reloads the model instead of refitting it.
+    Returns (domain documents, topic_model, topics, probs).
     """
-    if not domain_keyword:
-        return documents
-    filtered = [doc for doc in documents if domain_keyword.lower() in doc.lower()]
-    return filtered
-
-def main():
-    # Load and preprocess data
-    data = load_data("data/summaries.json")
-    documents = combine_fields(data)
-    preprocessed_docs = preprocess_documents(documents)
+    ids = InvertedIndex(documents).query(domain)
+    domain_docs = [documents[i] for i in ids]
+    if not domain_docs:
+        return domain_docs, None, None, None
+
+    def build():
+        topic_model, topics, probs = build_topic_model(domain_docs)
+        return DomainModel(topic_model, topics, probs, ids, get_topic_summary(topic_model))
+
+    key = ("main", domain.strip().lower(), model_id(FINE_TUNED_MODEL_PATH), file_digest(DATA_PATH))
+    domain_model = DomainModelRegistry().get(key, build)
+    return domain_docs, domain_model.topic_model, domain_model.topics, domain_model.probs
+
+def main(charts=False, domain=None):
+    # Load and preprocess data, streaming the corpus file in batches
+    preprocessed_docs = load_preprocessed_documents(DATA_PATH)
     
     # Filter out empty documents
     filtered_docs = [doc for doc in preprocessed_docs if doc.strip()]
@@ -76,14 +106,15 @@ def main():
         print("Error: No valid documents found after filtering. Exiting.")
         return
     
-    # Optional: Apply domain filtering (for example, filter for "healthcare")
-    # domain = "healthcare"  # change or set to None if no filtering is needed
-    domain = None  # currently no filtering; update this if required.
-    filtered_docs = filter_by_domain(filtered_docs, domain)
-    print(f"After domain filtering, {len(filtered_docs)} documents remain.")
-
-    # Build and train the topic model
-    topic_model, topics, probs = build_topic_model(filtered_docs)
+    # Build and train the topic model, optionally on one domain's documents only (--domain)
+    if domain:
+        filtered_docs, topic_model, topics, probs = fit_domain_model(filtered_docs, domain)
+        print(f"After domain filtering, {len(filtered_docs)} documents remain.")
+        if not filtered_docs:
+            print(f"Error: No documents matched the domain '{domain}'. Exiting.")
+            return
+    else:
+        topic_model, topics, probs = build_topic_model(filtered_docs)
     
     # Print human-friendly topic info
     print_topic_info(topic_model)
@@ -91,26 +122,89 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs("output", exist_ok=True)
     
-    # Visualizations: Save interactive visualizations as HTML
-    viz = visualize_topics_interactive(topic_model)
-    viz.write_html("output/topic_viz.html")
-    topic_model.visualize_barchart(top_n_topics=10).write_html("output/bar_chart.html")
-    topic_model.visualize_hierarchy().write_html("output/hierarchy.html")
-    topic_model.visualize_heatmap().write_html("output/heatmap.html")
-    
     # Save document-level topic info to CSV
     df = topic_model.get_document_info(filtered_docs)
     df.to_csv("output/topics_with_docs.csv", index=False)
     
     # Export JSON summary of topics
+    export_topic_summary(topic_model)
+    
+    # Optionally, save the BERTopic model for later use (domain models get their own path)
+    model_path = model_path_for(domain)
+    topic_model.save(model_path)
+
+    # Per-topic term counts for later incremental updates (only meaningful for the full corpus)
+    if not domain:
+        save_state(init_state(topic_model, filtered_docs, topics, n_records=len(preprocessed_docs)))
+
+    # Visualizations: rendered in parallel from the saved model only when asked for;
+    # otherwise /api/visual renders each one on first request.
+    if charts:
+        render_all(model_path, publish_dir="output")
+    print(f"Topic modeling complete. Output files saved under 'output/', model saved to '{model_path}'.")
+
+def export_topic_summary(topic_model):
+    """Write the JSON summary of topics to output/topics_summary.json."""
     topic_summary = get_topic_summary(topic_model)
     import json
     with open("output/topics_summary.json", "w", encoding="utf-8") as f:
         json.dump(topic_summary, f, indent=2)
-    
-    # Optionally, save the BERTopic model for later use
-    topic_model.save("bertopic_model")
-    print("Topic modeling complete. Visualizations and output files saved under 'output/'.")
+
+def update(charts=False):
+    """
+    Fold the entries appended to the corpus since the last run into the saved model:
+    only the new documents are preprocessed, embedded and assigned to existing topics.
+    Falls back to a full fit when there is no saved state or the update reports drift.
+    """
+    state = load_state()
+    if state is None or not os.path.exists(MODEL_PATH):
+        print("No saved model or incremental state found; running a full fit.")
+        return main(charts)
+
+    # Skip the records that are already part of the model
+    new_records = itertools.islice(iter_records(DATA_PATH), state.n_records, None)
+    new_docs = []
+    n_new_records = 0
+    for batch in iter_batches(new_records):
+        n_new_records += len(batch)
+        new_docs.extend(preprocess_documents(combine_fields(batch)))
+    new_docs = [doc for doc in new_docs if doc.strip()]
+    print(f"Found {n_new_records} new entries ({len(new_docs)} non-empty documents).")
+    if not new_docs:
+        state.n_records += n_new_records
+        save_state(state)
+        return
+
+    from bertopic import BERTopic
+    topic_model = BERTopic.load(MODEL_PATH)
+    embeddings = embed_documents(new_docs)
+    result = update_topic_model(topic_model, state, new_docs, embeddings, n_records=n_new_records)
+    if result.refit_required:
+        print(f"Full refit required ({result.reason}).")
+        return main(charts)
+
+    print(f"Assigned {result.n_new} documents (outlier fraction since last fit: {result.outlier_fraction:.3f}, "
+          f"drift: {result.drift:.3f}).")
+    print_topic_info(topic_model)
+    os.makedirs("output", exist_ok=True)
+    export_topic_summary(topic_model)
+    topic_model.save(MODEL_PATH)
+    save_state(state)
+    if charts:
+        render_all(MODEL_PATH, publish_dir="output")
+    print("Incremental update complete.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Topic modeling over data/summaries.json.")
+    parser.add_argument("--update", action="store_true",
+                        help="incrementally add entries appended since the last run instead of refitting")
+    parser.add_argument("--charts", action="store_true",
+                        help="render all visualizations (in parallel) into output/ after fitting")
+    parser.add_argument("--domain", default=None,
+                        help="fit on the documents matching these keywords only, e.g. --domain healthcare "
+                             "(reuses the model fitted earlier for the same domain and data)")
+    args = parser.parse_args()
+    if args.update:
+        update(args.charts)
+    else:
+        main(args.charts, args.domain)
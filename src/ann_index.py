@@ -0,0 +1,114 @@
+# File: TrendAnalysisAgent/src/ann_index.py
+
+import numpy as np
+
+# Below this many vectors a brute-force scan is both exact and fast enough.
+EXACT_SEARCH_THRESHOLD = 5_000
+# Vectors converted to float32 at a time while building or scanning
+_BLOCK_ROWS = 65_536
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores of a 1-D array, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+class AnnIndex:
+    """
+    In-memory approximate nearest-neighbour index over embeddings (cosine similarity).
+    Vectors are partitioned with a spherical k-means coarse quantizer (an IVF index);
+    a query only scans the `n_probe` partitions whose centroids are closest to it.
+    Small collections are searched exactly.
+    The embeddings are not copied: they stay in their stored dtype (e.g. the memmapped
+    float16/int8 EmbeddingStore matrix) and are normalized block by block while
+    scanning, so the index only adds one norm and one row id per vector. A uniform
+    scale, such as the int8 store's, does not change cosine similarities.
+    """
+
+    def __init__(self, embeddings, n_lists=None, n_probe=8, n_iter=10, seed=42,
+                 exact_threshold=EXACT_SEARCH_THRESHOLD):
+        self.vectors = embeddings if isinstance(embeddings, np.ndarray) else np.asarray(embeddings, dtype=np.float32)
+        self.n_probe = n_probe
+        self.centroids = None
+        self.rows = None
+        norms = np.concatenate([np.linalg.norm(block, axis=1) for block in self._blocks()] or [np.zeros(0)])
+        norms[norms == 0] = 1.0
+        self.inv_norms = (1.0 / norms).astype(np.float32)
+        if len(self.vectors) <= exact_threshold:
+            return
+
+        n_lists = n_lists or int(np.sqrt(len(self.vectors)))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(self.vectors), size=min(len(self.vectors), 64 * n_lists), replace=False))
+        sample = _normalize(self.vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignment = np.concatenate([np.argmax(block @ centroids.T, axis=1) for block in self._blocks()])
+        self.centroids = centroids
+        # Row ids grouped by partition; partition c is rows[offsets[c]:offsets[c + 1]]
+        self.rows = np.argsort(assignment, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    def _blocks(self, rows=None):
+        """float32 blocks of the vectors (all rows, or the given sorted rows), at most _BLOCK_ROWS at a time."""
+        n = len(self.vectors) if rows is None else len(rows)
+        for start in range(0, n, _BLOCK_ROWS):
+            selection = slice(start, start + _BLOCK_ROWS) if rows is None else rows[start:start + _BLOCK_ROWS]
+            yield np.asarray(self.vectors[selection], dtype=np.float32)
+
+    def _scores(self, query, rows=None):
+        """Cosine similarity of a normalized query with every vector (or the given sorted rows)."""
+        scores = np.concatenate([block @ query for block in self._blocks(rows)] or [np.zeros(0, dtype=np.float32)])
+        return scores * (self.inv_norms if rows is None else self.inv_norms[rows])
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=5):
+        """
+        Return (ids, scores), each of shape (len(queries), k'), where k' = min(k, len(index)).
+        Scores are cosine similarities, best first.
+        """
+        queries = _normalize(queries)
+        k = min(k, len(self.vectors))
+        ids = np.zeros((len(queries), k), dtype=np.int64)
+        scores = np.zeros((len(queries), k), dtype=np.float32)
+        if k == 0:
+            return ids, scores
+
+        if self.centroids is None:
+            for i, query in enumerate(queries):
+                row = self._scores(query)
+                best = _top_k(row, k)
+                ids[i], scores[i] = best, row[best]
+            return ids, scores
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :n_probe]
+        for i, query in enumerate(queries):
+            # Sorted row ids keep reads from a memmap sequential
+            candidates = np.sort(np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in probes[i]]))
+            row = self._scores(query, candidates)
+            best = _top_k(row, k)
+            found = len(best)
+            ids[i, :found], scores[i, :found] = candidates[best], row[best]
+            if found < k:
+                ids[i, found:] = -1
+        return ids, scores
@@ -0,0 +1,68 @@
+# File: TrendAnalysisAgent/src/cache_utils.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class BoundedCache:
+    """Thread-safe in-memory LRU cache holding at most `max_size` entries."""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+
+def file_fingerprint(path):
+    """Cheap change detector for a file: (size, modification time in ns)."""
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def model_fingerprint(model_path):
+    """Fingerprint of a saved model (file names, sizes and modification times)."""
+    h = hashlib.sha256()
+    if os.path.isdir(model_path):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(model_path) for name in names)
+    else:
+        paths = [model_path]
+    for path in paths:
+        h.update(os.path.relpath(path, model_path).encode("utf-8"))
+        h.update(repr(file_fingerprint(path)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,175 @@
+# File: TrendAnalysisAgent/src/dedup.py
+
+import zlib
+
+import numpy as np
+
+from src.metrics import timed
+
+# Estimated Jaccard similarity (of token 3-shingles) at or above which two documents
+# are treated as copies of each other.
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 128
+# 32 bands of 4 rows: a pair shares at least one band with probability
+# 1 - (1 - J**4)**32, about 0.9998 at J=0.7 and above 0.9999999 at the 0.8 threshold.
+# Dissimilar pairs that collide are rejected by the signature comparison.
+NUM_BANDS = 32
+SHINGLE_SIZE = 3
+# Shingles hashed per block when computing signatures (bounds the temporary arrays)
+_BLOCK_SHINGLES = 1 << 18
+
+
+class DedupResult:
+    """
+    Outcome of deduplicating n documents:
+      representatives: sorted ids of the documents to keep (one per duplicate cluster)
+      assignment:      for every document, the position of its representative in `representatives`
+      weights:         number of documents each representative stands for
+    """
+
+    def __init__(self, representatives, assignment):
+        self.representatives = representatives
+        self.assignment = assignment
+        self.weights = np.bincount(assignment, minlength=len(representatives))
+
+    @property
+    def n_duplicates(self):
+        return len(self.assignment) - len(self.representatives)
+
+    def select(self, items):
+        """The representatives' entries of a per-document list."""
+        return [items[i] for i in self.representatives]
+
+    def expand(self, values):
+        """Per-representative values (list or array) mapped back to every document."""
+        if isinstance(values, np.ndarray):
+            return values[self.assignment]
+        return [values[i] for i in self.assignment]
+
+
+def _shingle_hashes(document, size=SHINGLE_SIZE):
+    tokens = document.split()
+    if len(tokens) <= size:
+        return [zlib.crc32(" ".join(tokens).encode("utf-8"))]
+    return list({zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8")) for i in range(len(tokens) - size + 1)})
+
+
+def minhash_signatures(documents, num_perm=NUM_PERM, seed=1):
+    """
+    (num_perm, len(documents)) MinHash signatures over token shingles, computed in blocks.
+    Each permutation is a multiply-shift hash ((a * x + b) mod 2**64) >> 32 of the
+    32-bit shingle hash x, with a random odd a.
+    """
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64)[:, None]
+    shift = np.uint64(32)
+    signatures = np.empty((num_perm, len(documents)), dtype=np.uint64)
+
+    start = 0
+    while start < len(documents):
+        hashes, starts, end, total = [], [], start, 0
+        while end < len(documents) and (total < _BLOCK_SHINGLES or end == start):
+            doc_hashes = _shingle_hashes(documents[end])
+            starts.append(total)
+            hashes.extend(doc_hashes)
+            total += len(doc_hashes)
+            end += 1
+        values = (a * np.array(hashes, dtype=np.uint64)[None, :] + b) >> shift
+        signatures[:, start:end] = np.minimum.reduceat(values, starts, axis=1)
+        start = end
+    return signatures
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent, i, j):
+    """Merge the groups of i and j; returns the root of the merged group."""
+    root_i, root_j = _find(parent, i), _find(parent, j)
+    root, other = min(root_i, root_j), max(root_i, root_j)
+    parent[other] = root
+    return root
+
+
+def _merge_bucket(members, signatures, unique, parent, threshold):
+    """
+    Merge every pair of LSH bucket members (positions in `unique`) whose estimated
+    similarity reaches `threshold`. A member is compared with each group already
+    seen in the bucket: with its first member, then, only if that fails, with the rest.
+    """
+    groups = {}  # root -> bucket members in that group
+    for i in members:
+        root = _find(parent, unique[i])
+        merged = groups.pop(root, [])
+        for other in list(groups):
+            group = groups[other]
+            if (signatures[:, group[0]] == signatures[:, i]).mean() < threshold:
+                similarity = (signatures[:, group[1:]] == signatures[:, [i]]).mean(axis=0)
+                if not (similarity >= threshold).any():
+                    continue
+            root = _union(parent, unique[i], unique[group[0]])
+            merged += groups.pop(other)
+        merged.append(i)
+        groups[root] = merged
+
+
+@timed()
+def deduplicate(documents, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, num_bands=NUM_BANDS):
+    """
+    Group exact and near-duplicate documents (preprocessed text) with MinHash/LSH.
+    Exact copies are grouped by text; the remaining unique texts are bucketed per LSH
+    band, and any two members of a bucket whose estimated Jaccard similarity reaches
+    `threshold` are merged. Each group is represented by its first document.
+    """
+    n = len(documents)
+    first_seen = {}
+    parent = np.arange(n)
+    for i, doc in enumerate(documents):
+        parent[i] = first_seen.setdefault(doc, i)
+    unique = np.flatnonzero(parent == np.arange(n))
+    unique = unique[[bool(documents[i].strip()) for i in unique]] if len(unique) else unique
+
+    if len(unique) > 1:
+        signatures = minhash_signatures([documents[i] for i in unique], num_perm)
+        rows = num_perm // num_bands
+        for band in range(num_bands):
+            keys = np.ascontiguousarray(signatures[band * rows:(band + 1) * rows].T)
+            keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+            _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            inverse = inverse.ravel()
+            # Only buckets holding more than one document need comparing
+            shared = np.flatnonzero(counts[inverse] > 1)
+            if not len(shared):
+                continue
+            shared = shared[np.argsort(inverse[shared], kind="stable")]
+            bounds = np.flatnonzero(np.diff(inverse[shared])) + 1
+            for members in np.split(shared, bounds):
+                _merge_bucket(members, signatures, unique, parent, threshold)
+
+    roots = np.array([_find(parent, i) for i in range(n)], dtype=np.int64)
+    representatives, assignment = np.unique(roots, return_inverse=True)
+    return DedupResult(representatives, assignment.ravel())
+
+
+def expand_topic_model(topic_model, dedup, topics, probs=None):
+    """
+    Map topics (and probabilities) fitted on the representatives back to every
+    document, and make the model's topics_ and topic_sizes_ count each duplicate,
+    so topic summaries and topics over time reflect the full corpus.
+    Returns (topics, probs) for all documents.
+    """
+    topics = dedup.expand(list(topics))
+    if probs is not None:
+        probs = dedup.expand(np.asarray(probs))
+        topic_model.probabilities_ = probs
+    sizes = {}
+    for topic in topics:
+        sizes[topic] = sizes.get(topic, 0) + 1
+    topic_model.topics_ = topics
+    topic_model.topic_sizes_ = dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+    return topics, probs
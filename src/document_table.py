@@ -0,0 +1,49 @@
+# File: TrendAnalysisAgent/src/document_table.py
+
+import numpy as np
+
+
+class DocumentTable:
+    """
+    Precomputed document/topic table. Each row is serialized to a JSON string once,
+    so pages and exports are answered by concatenating rows without re-encoding.
+    """
+
+    def __init__(self, document_info, timestamps):
+        """
+        document_info: DataFrame from BERTopic's get_document_info (one row per document).
+        timestamps: datetime (or None) for each row.
+        """
+        dates = [ts.strftime("%Y-%m-%d") if ts is not None else None for ts in timestamps]
+        document_info = document_info.assign(Date=dates)
+        self.rows = document_info.to_json(orient="records", lines=True).splitlines()
+        self.topics = document_info["Topic"].to_numpy()
+        self.dates = np.array([d or "NaT" for d in dates], dtype="datetime64[D]")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def select(self, topic=None, start=None, end=None):
+        """Ids of the rows matching an optional topic and inclusive YYYY-MM-DD date range."""
+        mask = np.ones(len(self.rows), dtype=bool)
+        if topic is not None:
+            mask &= self.topics == topic
+        if start is not None:
+            mask &= self.dates >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= self.dates <= np.datetime64(end, "D")
+        return np.flatnonzero(mask)
+
+    def page_json(self, ids, offset, limit):
+        """JSON object with one page of rows plus paging metadata."""
+        page = ids[offset:offset + limit]
+        documents = ",".join(self.rows[i] for i in page)
+        return (
+            f'{{"total":{len(ids)},"offset":{offset},"limit":{limit},'
+            f'"documents":[{documents}]}}'
+        )
+
+    def iter_ndjson(self, ids):
+        """Yield the selected rows as newline-delimited JSON, one row at a time."""
+        for i in ids:
+            yield self.rows[i] + "\n"
@@ -0,0 +1,171 @@
+# File: TrendAnalysisAgent/src/domain_models.py
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from src import metrics
+from src.snapshot import MODEL_DIRNAME, load_snapshot, read_snapshot_state, save_snapshot
+
+DOMAIN_MODELS_DIR = os.path.join("cache", "domain_models")
+# Memory budget for the fitted models kept in memory (DOMAIN_MODEL_MEMORY_MB)
+DEFAULT_MEMORY_BUDGET = int(float(os.environ.get("DOMAIN_MODEL_MEMORY_MB", "512")) * 2**20)
+
+
+class DomainModel:
+    """
+    A BERTopic model fitted on one domain's documents:
+      topic_model: the fitted model
+      topics, probs: per-document assignments, in the order of `doc_ids`
+      doc_ids: ids of the corpus documents the model was fitted on
+      summary: get_topic_summary output
+      nbytes: estimated memory use (size of the model when serialized)
+    """
+
+    def __init__(self, topic_model, topics, probs, doc_ids, summary, nbytes=0):
+        self.topic_model = topic_model
+        self.topics = topics
+        self.probs = probs
+        self.doc_ids = list(doc_ids)
+        self.summary = summary
+        self.nbytes = nbytes
+        self.built_at = time.time()
+
+
+class _Flight:
+    """A build or reload in progress; other requests for the same key wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.model = None
+        self.error = None
+
+
+def _disk_size(path):
+    """Size of a file, or of all files under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def key_digest(key):
+    """Stable name for a registry key (a tuple of strings), used for its directory on disk."""
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:24]
+
+
+class DomainModelRegistry:
+    """
+    Fitted topic models per domain, keyed by a tuple that includes the corpus
+    version (e.g. (keywords, match mode, data hash)), so a new corpus never serves
+    stale models.
+    Every model is written to disk when it is built; the models kept in memory are
+    bounded by `memory_budget` bytes, evicting the least recently used first, and an
+    evicted model is reloaded from disk on its next request instead of refitted.
+    Concurrent requests for a key that is being built or reloaded wait for that one
+    build instead of starting their own.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, directory=DOMAIN_MODELS_DIR):
+        self.memory_budget = memory_budget
+        self.directory = directory
+        self._models = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.counts = {"hit": 0, "reload": 0, "build": 0, "eviction": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key_digest(key))
+
+    def _count(self, result):
+        self.counts[result] += 1
+        metrics.increment("trend_domain_model_requests_total", result=result)
+
+    def get(self, key, build, refresh=False):
+        """
+        The model for `key`: from memory, else reloaded from disk, else built by
+        `build()` (which returns a DomainModel) and written to disk. With `refresh`
+        the model is always rebuilt and replaces the stored one.
+        """
+        with self._lock:
+            model = None if refresh else self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._count("hit")
+                return model
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.model
+
+        try:
+            model = None if refresh else self._load(key)
+            result = "reload"
+            if model is None:
+                with metrics.span("domain_model_build"):
+                    model = build()
+                self._save(key, model)
+                result = "build"
+            with self._lock:
+                self._count(result)
+                self._models[key] = model
+                self._evict(keep=key)
+            flight.model = model
+            return model
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def _evict(self, keep):
+        while len(self._models) > 1 and self.memory_bytes() > self.memory_budget:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            del self._models[oldest]
+            self._count("eviction")
+
+    def _save(self, key, model):
+        path = self._path(key)
+        save_snapshot(model.topic_model, model.topics, model.probs, key_digest(key), path,
+                      summary=model.summary, doc_ids=model.doc_ids)
+        model.nbytes = _disk_size(os.path.join(path, MODEL_DIRNAME))
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            snapshot = load_snapshot(key_digest(key), path)
+        except Exception as e:
+            print(f"⚠️ Could not reload domain model from {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        if snapshot is None:
+            return None
+        topic_model, topics, probs = snapshot
+        state = read_snapshot_state(path)
+        return DomainModel(topic_model, topics, probs, state.get("doc_ids", []), state.get("summary"),
+                           nbytes=_disk_size(os.path.join(path, MODEL_DIRNAME)))
+
+    def memory_bytes(self):
+        return sum(model.nbytes for model in self._models.values())
+
+    def stats(self):
+        """Models in memory (most recently used last), memory use against the budget, and counters."""
+        with self._lock:
+            return {
+                "models": [{"key": list(key), "documents": len(model.doc_ids), "mb": round(model.nbytes / 2**20, 2)}
+                           for key, model in self._models.items()],
+                "memory_mb": round(self.memory_bytes() / 2**20, 2),
+                "budget_mb": round(self.memory_budget / 2**20, 2),
+                **self.counts,
+            }
@@ -0,0 +1,142 @@
+# File: TrendAnalysisAgent/src/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "embeddings.sqlite")
+DEFAULT_MAX_ENTRIES = 500_000
+
+# SQLite caps the number of bound parameters per statement (999 on older builds).
+_SQL_CHUNK = 500
+
+
+def embedding_key(model_name, text):
+    """Content address for a (model, preprocessed text) pair."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache backed by a single SQLite file.
+    Vectors are stored as raw float32 bytes and evicted least-recently-used
+    once the cache holds more than `max_entries` rows.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Return {key: vector} for every key present in the cache."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, dim, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in rows],
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, keys, vectors):
+        """Store vectors under the given keys, then enforce the size cap."""
+        now = time.time()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = [(key, int(vec.shape[0]), vec.tobytes(), now) for key, vec in zip(keys, vectors)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN"
+                " (SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        """Cumulative hit/miss counts for this process plus the current cache size."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def encode_with_cache(documents, model_name, encode, cache=None, verbose=False):
+    """
+    Embed `documents`, serving cached vectors in bulk and calling
+    `encode(texts)` only for the texts that are not cached yet.
+    Duplicate texts are encoded once. Returns a float32 array in input order.
+    """
+    documents = list(documents)
+    if cache is None or not documents:
+        return np.asarray(encode(documents), dtype=np.float32)
+
+    keys = [embedding_key(model_name, doc) for doc in documents]
+    unique_keys = list(dict.fromkeys(keys))
+    found = cache.get_many(unique_keys)
+
+    missing = {}
+    for key, doc in zip(keys, documents):
+        if key not in found and key not in missing:
+            missing[key] = doc
+    if missing:
+        new_vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+        cache.put_many(list(missing.keys()), new_vectors)
+        found.update(zip(missing.keys(), new_vectors))
+
+    if verbose:
+        print(f"Embedding cache: {len(unique_keys) - len(missing)} hits, {len(missing)} misses")
+    return np.vstack([found[key] for key in keys])
@@ -0,0 +1,223 @@
+# File: TrendAnalysisAgent/src/embedding_executor.py
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import metrics
+from src.model_registry import DEFAULT_BACKEND, get_embedding_model, model_id
+from src.process_pools import safe_start_method
+
+# Worker processes per executor (EMBED_WORKERS=auto uses every core); 1 encodes in-process.
+DEFAULT_WORKERS = os.environ.get("EMBED_WORKERS", "1")
+DEFAULT_BATCH_SIZE = 32
+CANDIDATE_BATCH_SIZES = (16, 32, 64, 128)
+# Batch size is tuned once per executor, on a sample of this many documents,
+# and only when a call brings at least TUNE_MIN_DOCUMENTS documents.
+TUNE_SAMPLE_SIZE = 256
+TUNE_MIN_DOCUMENTS = 2_000
+# Below this many documents the pool is not worth the transfer overhead.
+PARALLEL_MIN_DOCUMENTS = 1_000
+# Documents sent to a worker per task, in batches
+SHARD_BATCHES = 8
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _resolve_workers(workers):
+    if workers in (None, ""):
+        workers = DEFAULT_WORKERS
+    if workers == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _init_worker(model_name, backend, threads):
+    """Load the model in the worker, limiting intra-op threads so the workers do not oversubscribe the cores."""
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    get_embedding_model(model_name, backend)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _encode(model_name, backend, texts, batch_size):
+    embeddings = get_embedding_model(model_name, backend).encode(
+        texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _tune(model_name, backend, sample, candidates):
+    """Documents per second for each candidate batch size on a length-sorted sample."""
+    _encode(model_name, backend, sample[:candidates[0]], candidates[0])  # warm-up
+    throughput = {}
+    for batch_size in candidates:
+        start = time.perf_counter()
+        _encode(model_name, backend, sample, batch_size)
+        throughput[batch_size] = len(sample) / max(time.perf_counter() - start, 1e-9)
+    return throughput
+
+
+class EmbeddingExecutor:
+    """
+    CPU embedding executor for one SentenceTransformer model and backend.
+    Documents are sorted by length so each batch pads to similar lengths, the batch
+    size is auto-tuned once on a sample, and with workers > 1 length-sorted shards
+    are encoded by a persistent process pool; each worker loads the model itself, and
+    the parent process never runs inference once the pool exists. The pool is forked
+    only when that is safe (see safe_start_method), otherwise spawned; servers call
+    start() at startup so their workers are forked before any thread or inference
+    exists. Embeddings come back in input order.
+    """
+
+    def __init__(self, model_name, workers=None, batch_size=None, candidate_batch_sizes=CANDIDATE_BATCH_SIZES,
+                 backend=None):
+        self.model_name = model_name
+        self.backend = backend or DEFAULT_BACKEND
+        self.workers = _resolve_workers(workers)
+        self.batch_size = batch_size
+        self.candidate_batch_sizes = tuple(candidate_batch_sizes)
+        self.tuning = {}
+        self.documents = 0
+        self.seconds = 0.0
+        self.last_call = None
+        self._pool = None
+        self.start_method = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self.start_method = safe_start_method()
+            context = multiprocessing.get_context(self.start_method)
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self.model_name, self.backend, threads))
+        return self._pool
+
+    def start(self):
+        """Launch the worker processes now (no-op with a single worker)."""
+        if self.workers > 1:
+            with self._lock:
+                pool = self._get_pool()
+            for future in [pool.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def _run(self, fn, *args):
+        """Run fn in a worker when a pool is in use, otherwise in-process."""
+        if self._pool is not None:
+            return self._pool.submit(fn, *args).result()
+        return fn(*args)
+
+    def _tune_batch_size(self, sorted_documents):
+        step = max(1, len(sorted_documents) // TUNE_SAMPLE_SIZE)
+        sample = sorted_documents[::step][:TUNE_SAMPLE_SIZE]
+        self.tuning = self._run(_tune, self.model_name, self.backend, sample, self.candidate_batch_sizes)
+        self.batch_size = max(self.tuning, key=self.tuning.get)
+        print(f"Embedding batch size tuned to {self.batch_size} "
+              f"({', '.join(f'{bs}: {rate:.0f} docs/s' for bs, rate in self.tuning.items())})")
+
+    def encode(self, documents, verbose=False):
+        """Embed `documents` (float32, one row per document, in input order)."""
+        documents = list(documents)
+        if not documents:
+            dim = get_embedding_model(self.model_name, self.backend).get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+        start = time.perf_counter()
+        order = np.argsort([-len(doc) for doc in documents], kind="stable")
+        sorted_documents = [documents[i] for i in order]
+
+        with self._lock:
+            parallel = self.workers > 1 and len(documents) >= PARALLEL_MIN_DOCUMENTS
+            if parallel:
+                self._get_pool()
+            if self.batch_size is None and len(documents) >= TUNE_MIN_DOCUMENTS:
+                self._tune_batch_size(sorted_documents)
+            batch_size = self.batch_size or DEFAULT_BATCH_SIZE
+
+        if parallel:
+            shard = batch_size * SHARD_BATCHES
+            futures = [self._pool.submit(_encode, self.model_name, self.backend, sorted_documents[i:i + shard], batch_size)
+                       for i in range(0, len(sorted_documents), shard)]
+            sorted_embeddings = np.vstack([future.result() for future in futures])
+        else:
+            sorted_embeddings = self._run(_encode, self.model_name, self.backend, sorted_documents, batch_size)
+
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.documents += len(documents)
+            self.seconds += elapsed
+            self.last_call = {"documents": len(documents), "seconds": elapsed,
+                              "docs_per_sec": len(documents) / max(elapsed, 1e-9), "batch_size": batch_size,
+                              "workers": self.workers if parallel else 1}
+        metrics.increment("trend_embedded_documents_total", len(documents), model=self.model_id)
+        metrics.observe("trend_embedding_batch_seconds", elapsed, model=self.model_id)
+        if verbose:
+            print(f"Embedded {len(documents)} documents in {elapsed:.2f}s "
+                  f"({self.last_call['docs_per_sec']:.0f} docs/s, batch size {batch_size}, "
+                  f"{self.last_call['workers']} worker(s))")
+        return embeddings
+
+    def report(self):
+        """Throughput so far: totals, the last call, and the batch-size tuning results."""
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "backend": self.backend,
+                "workers": self.workers,
+                "start_method": self.start_method,
+                "batch_size": self.batch_size,
+                "documents": self.documents,
+                "seconds": round(self.seconds, 3),
+                "docs_per_sec": round(self.documents / self.seconds, 1) if self.seconds else None,
+                "last_call": self.last_call,
+                "tuning": {str(bs): round(rate, 1) for bs, rate in self.tuning.items()},
+            }
+
+    @property
+    def model_id(self):
+        return model_id(self.model_name, self.backend)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def get_executor(model_name, workers=None, backend=None):
+    """Process-wide executor for `model_name` (one per model, backend and worker count)."""
+    workers = _resolve_workers(workers)
+    key = (model_id(model_name, backend), workers)
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            executor = _executors[key] = EmbeddingExecutor(model_name, workers, backend=backend)
+        return executor
+
+
+def throughput_report():
+    """Reports of every executor created in this process."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return [executor.report() for executor in executors]
+
+
+@atexit.register
+def _shutdown_executors():
+    for executor in list(_executors.values()):
+        executor.shutdown()
@@ -0,0 +1,168 @@
+# File: TrendAnalysisAgent/src/embedding_store.py
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from src.embedding_cache import embedding_key
+
+MAGIC = b"TAEMB1\n"
+HEADER_SIZE = 4096
+DTYPES = {"float16": np.float16, "int8": np.int8}
+# int8 rows store round(value * 127); this assumes L2-normalized embeddings (values in [-1, 1]).
+INT8_SCALE = 127.0
+
+
+class EmbeddingStore:
+    """
+    Compact on-disk embedding matrix opened with np.memmap.
+
+    <path>      fixed-size header (magic + JSON metadata: model, dim, dtype) followed
+                by one contiguous row per embedding (float16, or int8-quantized)
+    <path>.ids  one id per line; the line number is the row offset
+
+    Both files are append-only, so adding embeddings never rewrites existing rows,
+    and any number of processes can map the same file read-only without copying.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"'{path}' is not an embedding store.")
+        self.metadata = json.loads(header[len(MAGIC):].rstrip(b" \n\x00").decode("utf-8"))
+        self.model_name = self.metadata["model"]
+        self.dim = self.metadata["dim"]
+        self.dtype = DTYPES[self.metadata["dtype"]]
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = []
+        self._offsets = {}
+        self._load_ids()
+
+    @classmethod
+    def create(cls, path, model_name, dim, dtype="float16"):
+        """Create an empty store (overwriting any existing one) and open it."""
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}' (expected one of {sorted(DTYPES)}).")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        metadata = json.dumps({"model": model_name, "dim": int(dim), "dtype": dtype}).encode("utf-8")
+        if len(MAGIC) + len(metadata) + 1 > HEADER_SIZE:
+            raise ValueError("Embedding store metadata does not fit in the header.")
+        with open(path, "wb") as f:
+            f.write((MAGIC + metadata + b"\n").ljust(HEADER_SIZE, b" "))
+        with open(path + ".ids", "w", encoding="utf-8"):
+            pass
+        return cls(path)
+
+    @classmethod
+    def open_or_create(cls, path, model_name, dim, dtype="float16"):
+        if os.path.exists(path):
+            store = cls(path)
+            if store.model_name != model_name or store.dim != dim:
+                raise ValueError(f"Embedding store '{path}' holds {store.model_name} ({store.dim}d) embeddings.")
+            return store
+        return cls.create(path, model_name, dim, dtype)
+
+    def _row_bytes(self):
+        return self.dim * np.dtype(self.dtype).itemsize
+
+    def _rows_on_disk(self):
+        return (os.path.getsize(self.path) - HEADER_SIZE) // self._row_bytes()
+
+    def _load_ids(self):
+        with open(self.path + ".ids", "r", encoding="utf-8") as f:
+            ids = f.read().splitlines()
+        # A crash between the two appends can leave one file longer than the other
+        ids = ids[:self._rows_on_disk()]
+        self._ids = ids
+        self._offsets = {id_: offset for offset, id_ in enumerate(ids)}
+        self._matrix = None
+
+    def refresh(self):
+        """Pick up rows appended by other processes."""
+        with self._lock:
+            self._load_ids()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id_):
+        return id_ in self._offsets
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    def offset(self, id_):
+        return self._offsets[id_]
+
+    @property
+    def matrix(self):
+        """Read-only (n, dim) memmap of the stored rows (float16 or int8)."""
+        with self._lock:
+            if self._matrix is None or len(self._matrix) != len(self._ids):
+                if not self._ids:
+                    return np.zeros((0, self.dim), dtype=self.dtype)
+                self._matrix = np.memmap(self.path, dtype=self.dtype, mode="r",
+                                         offset=HEADER_SIZE, shape=(len(self._ids), self.dim))
+            return self._matrix
+
+    def _encode(self, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dtype is np.int8:
+            return np.clip(np.rint(embeddings * INT8_SCALE), -127, 127).astype(np.int8)
+        return embeddings.astype(np.float16)
+
+    def _decode(self, rows):
+        if self.dtype is np.int8:
+            return rows.astype(np.float32) / INT8_SCALE
+        return rows.astype(np.float32)
+
+    def append(self, ids, embeddings):
+        """Append rows; ids already in the store are skipped. Returns the offsets of all given ids."""
+        embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of shape (n, {self.dim}), got {embeddings.shape}.")
+        with self._lock:
+            new = [(i, id_) for i, id_ in enumerate(ids) if id_ not in self._offsets]
+            if new:
+                positions = [i for i, _ in new]
+                with open(self.path, "ab") as f:
+                    f.write(self._encode(embeddings[positions]).tobytes())
+                with open(self.path + ".ids", "a", encoding="utf-8") as f:
+                    f.write("".join(id_ + "\n" for _, id_ in new))
+                for _, id_ in new:
+                    self._offsets[id_] = len(self._ids)
+                    self._ids.append(id_)
+                self._matrix = None
+            return [self._offsets[id_] for id_ in ids]
+
+    def get(self, ids):
+        """float32 copy of the rows for the given ids."""
+        return self.rows([self._offsets[id_] for id_ in ids])
+
+    def rows(self, offsets=None):
+        """float32 copy of the rows at the given offsets (all rows if None)."""
+        matrix = self.matrix
+        return self._decode(matrix if offsets is None else matrix[np.asarray(offsets, dtype=np.int64)])
+
+
+def embed_into_store(store, documents, encode):
+    """
+    Make sure every document has a row in the store (keyed by embedding_key of the
+    store's model and the text), encoding only the missing ones. Returns row offsets.
+    """
+    keys = [embedding_key(store.model_name, doc) for doc in documents]
+    missing = {}
+    for key, doc in zip(keys, documents):
+        if key not in store and key not in missing:
+            missing[key] = doc
+    if missing:
+        store.append(list(missing.keys()), encode(list(missing.values())))
+    return [store.offset(key) for key in keys]
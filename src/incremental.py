@@ -0,0 +1,159 @@
+# File: TrendAnalysisAgent/src/incremental.py
+
+import os
+import pickle
+
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_STATE_PATH = os.path.join("output", "incremental_state.pkl")
+
+# A full refit is recommended once either threshold is crossed.
+DRIFT_THRESHOLD = 0.35
+OUTLIER_THRESHOLD = 0.30
+
+
+class IncrementalState:
+    """
+    Everything needed to fold new documents into a fitted BERTopic model
+    without revisiting the history: per-topic term counts (one sparse row per
+    topic, in c_tf_idf_ row order), the topic distribution at the last full fit,
+    and how many corpus records have been consumed so far.
+    """
+
+    def __init__(self, topic_ids, term_counts, reference_distribution, n_records):
+        self.topic_ids = list(topic_ids)
+        self.term_counts = term_counts
+        self.reference_distribution = reference_distribution
+        self.n_records = n_records
+        self.docs_since_fit = 0
+        self.outliers_since_fit = 0
+
+
+class UpdateResult:
+    def __init__(self, topics, n_new, outlier_fraction, drift, refit_required, reason=None):
+        self.topics = topics
+        self.n_new = n_new
+        self.outlier_fraction = outlier_fraction
+        self.drift = drift
+        self.refit_required = refit_required
+        self.reason = reason
+
+
+def _topic_rows(topic_ids, topics):
+    """
+    Row index of each topic id (topic ids are sorted, -1 first, as in c_tf_idf_).
+    Topics without a row (outliers of a model fitted without any) map to -1.
+    """
+    position = {topic: row for row, topic in enumerate(topic_ids)}
+    return np.array([position.get(t, -1) for t in topics], dtype=np.int64)
+
+
+def _counts_by_topic(topic_model, documents, rows, n_rows):
+    """Sum the vectorizer's term counts of `documents` into one row per topic."""
+    doc_counts = topic_model.vectorizer_model.transform(documents)
+    keep = np.flatnonzero(rows >= 0)
+    assignment = sp.csr_matrix(
+        (np.ones(len(keep)), (rows[keep], keep)), shape=(n_rows, len(rows))
+    )
+    return (assignment @ doc_counts).tocsr()
+
+
+def _distribution(topic_ids, topics):
+    rows = _topic_rows(topic_ids, topics)
+    counts = np.bincount(rows[rows >= 0], minlength=len(topic_ids)).astype(float)
+    return counts / counts.sum() if counts.sum() else counts
+
+
+def _js_distance(p, q):
+    """Jensen-Shannon distance (base 2, in [0, 1]) between two distributions."""
+    m = 0.5 * (p + q)
+
+    def kl(a, b):
+        mask = a > 0
+        return float(np.sum(a[mask] * np.log2(a[mask] / b[mask])))
+
+    return float(np.sqrt(max(0.5 * kl(p, m) + 0.5 * kl(q, m), 0.0)))
+
+
+def init_state(topic_model, documents, topics, n_records=None):
+    """Build the incremental state right after a full fit (one pass over the fitted documents)."""
+    topic_ids = sorted(set(topic_model.get_topics().keys()))
+    term_counts = _counts_by_topic(topic_model, documents, _topic_rows(topic_ids, topics), len(topic_ids))
+    return IncrementalState(
+        topic_ids,
+        term_counts,
+        _distribution(topic_ids, topics),
+        n_records if n_records is not None else len(documents),
+    )
+
+
+def _refresh_representations(topic_model, state):
+    """Recompute c-TF-IDF and topic keywords from the per-topic term counts."""
+    c_tf_idf = topic_model.ctfidf_model.fit_transform(state.term_counts)
+    words = topic_model.vectorizer_model.get_feature_names_out()
+    top_n = getattr(topic_model, "top_n_words", 10)
+    representations = {}
+    for row, topic in enumerate(state.topic_ids):
+        scores = c_tf_idf.getrow(row).toarray().ravel()
+        best = np.argsort(scores)[::-1][:top_n]
+        representations[topic] = [(words[i], float(scores[i])) for i in best if scores[i] > 0]
+    topic_model.c_tf_idf_ = c_tf_idf
+    topic_model.topic_representations_ = representations
+    topic_model.topic_labels_ = {
+        topic: f"{topic}_" + "_".join(word for word, _ in words_[:4])
+        for topic, words_ in representations.items()
+    }
+
+
+def update_topic_model(topic_model, state, documents, embeddings=None,
+                       drift_threshold=DRIFT_THRESHOLD, outlier_threshold=OUTLIER_THRESHOLD,
+                       n_records=None):
+    """
+    Assign new documents to the existing topics and fold them into topic sizes and
+    c-TF-IDF keywords. Cost depends on the number of new documents, not the history.
+    If the new batch drifts too far from the fitted topic distribution, or the share of
+    outliers since the last full fit grows too large, nothing is applied and the result
+    has refit_required=True.
+    """
+    if not documents:
+        return UpdateResult([], 0, 0.0, 0.0, False)
+    topics, _ = topic_model.transform(documents, embeddings)
+    topics = [int(t) for t in topics]
+
+    n_outliers = sum(1 for t in topics if t == -1)
+    outlier_fraction = (state.outliers_since_fit + n_outliers) / (state.docs_since_fit + len(documents))
+    drift = _js_distance(_distribution(state.topic_ids, topics), state.reference_distribution)
+    if drift > drift_threshold:
+        return UpdateResult(topics, len(documents), outlier_fraction, drift, True,
+                            f"topic drift {drift:.3f} > {drift_threshold}")
+    if outlier_fraction > outlier_threshold:
+        return UpdateResult(topics, len(documents), outlier_fraction, drift, True,
+                            f"outlier fraction {outlier_fraction:.3f} > {outlier_threshold}")
+
+    rows = _topic_rows(state.topic_ids, topics)
+    state.term_counts = state.term_counts + _counts_by_topic(topic_model, documents, rows, len(state.topic_ids))
+    state.docs_since_fit += len(documents)
+    state.outliers_since_fit += n_outliers
+    state.n_records += n_records if n_records is not None else len(documents)
+
+    sizes = dict(topic_model.topic_sizes_)
+    for topic in topics:
+        sizes[topic] = sizes.get(topic, 0) + 1
+    topic_model.topic_sizes_ = sizes
+    topic_model.topics_ = list(topic_model.topics_) + topics
+    _refresh_representations(topic_model, state)
+    return UpdateResult(topics, len(documents), outlier_fraction, drift, False)
+
+
+def save_state(state, path=DEFAULT_STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(state, f)
+
+
+def load_state(path=DEFAULT_STATE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,73 @@
+# File: TrendAnalysisAgent/src/inverted_index.py
+
+from bisect import bisect_left
+from heapq import merge
+
+from src.preprocess import preprocess
+
+
+def _contains(postings, doc_id):
+    i = bisect_left(postings, doc_id)
+    return i < len(postings) and postings[i] == doc_id
+
+
+class InvertedIndex:
+    """
+    Token -> document-id inverted index over preprocessed documents.
+    Document ids are positions in the order documents were added, so every
+    posting list is sorted and new documents can be appended incrementally.
+    """
+
+    def __init__(self, documents=()):
+        self._postings = {}
+        self.num_documents = 0
+        self.add_documents(documents)
+
+    def add_documents(self, documents):
+        """Index further documents; they get the next consecutive ids. Returns the new ids."""
+        start = self.num_documents
+        postings = self._postings
+        for doc_id, doc in enumerate(documents, start):
+            for token in set(doc.split()):
+                posting = postings.get(token)
+                if posting is None:
+                    postings[token] = [doc_id]
+                else:
+                    posting.append(doc_id)
+            self.num_documents = doc_id + 1
+        return range(start, self.num_documents)
+
+    def postings(self, token):
+        return self._postings.get(token, [])
+
+    def query(self, keywords, mode="and"):
+        """
+        Return the sorted ids of documents containing all ("and") or any ("or")
+        of the keywords. `keywords` is a string or a list of strings; each one is
+        run through the same preprocessing as the documents before lookup, so
+        "Healthcare AI" is the two tokens "healthcare" and "ai".
+        An empty query (no keywords, or only blank ones) matches every document;
+        keywords that preprocess to nothing (stop words such as "it") match none.
+        """
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        tokens = {token for keyword in keywords for token in preprocess(keyword).split()}
+        if not tokens:
+            if any(keyword.strip() for keyword in keywords):
+                return []
+            return list(range(self.num_documents))
+        lists = [self.postings(token) for token in tokens]
+        if mode == "and":
+            lists.sort(key=len)
+            smallest, rest = lists[0], lists[1:]
+            return [doc_id for doc_id in smallest if all(_contains(p, doc_id) for p in rest)]
+        if mode == "or":
+            result = []
+            for doc_id in merge(*lists):
+                if not result or result[-1] != doc_id:
+                    result.append(doc_id)
+            return result
+        raise ValueError(f"Unknown query mode '{mode}' (expected 'and' or 'or').")
+
+    def __len__(self):
+        return self.num_documents
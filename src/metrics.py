@@ -0,0 +1,155 @@
+# File: TrendAnalysisAgent/src/metrics.py
+
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentation is off unless TREND_METRICS=1; disabled spans cost one flag check.
+_enabled = os.environ.get("TREND_METRICS", "0") == "1"
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, math.inf)
+
+STAGE_METRIC = "trend_stage_duration_seconds"
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_local = threading.local()
+
+
+class _Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def observe(metric, value, **labels):
+    """Record `value` in the histogram `metric` with the given labels."""
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        histogram.observe(value)
+
+
+def increment(metric, amount=1, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as pipeline stage `name` (no-op when disabled)."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(STAGE_METRIC, elapsed, stage=name)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def timed(name=None):
+    """Decorator form of span(); the stage name defaults to the function name."""
+    def decorator(fn):
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_request():
+    """Start collecting the spans of the current thread's request."""
+    _local.spans = []
+
+
+def end_request():
+    """Stop collecting and return [(stage, seconds), ...] for the current request."""
+    spans = getattr(_local, "spans", None) or []
+    _local.spans = None
+    return spans
+
+
+def server_timing_header(spans, total=None):
+    """Format spans for the Server-Timing response header."""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    """All counters and histograms in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            ((key, list(h.bucket_counts), h.total, h.count) for key, h in _histograms.items()),
+            key=lambda item: item[0],
+        )
+    seen = set()
+    for (metric, labels), value in counters:
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    for (metric, labels), bucket_counts, total, count in histograms:
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} histogram")
+            seen.add(metric)
+        cumulative = 0
+        for bound, n in zip(BUCKETS, bucket_counts):
+            cumulative += n
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
@@ -0,0 +1,80 @@
+# File: TrendAnalysisAgent/src/model_registry.py
+
+import os
+import threading
+import time
+
+from src.onnx_backend import QUANTIZATION_CONFIG
+
+BACKENDS = ("torch", "onnx")
+# EMBEDDING_BACKEND=onnx serves models from a dynamically int8-quantized ONNX export
+# (see src/onnx_backend.py) instead of the full-precision PyTorch weights.
+DEFAULT_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+
+_models = {}
+_load_times = {}
+_registry_lock = threading.Lock()
+_model_locks = {}
+
+
+def _lock_for(name):
+    with _registry_lock:
+        lock = _model_locks.get(name)
+        if lock is None:
+            lock = _model_locks[name] = threading.Lock()
+        return lock
+
+
+def model_id(name, backend=None):
+    """
+    Registry key of `name` served by `backend` (EMBEDDING_BACKEND by default).
+    Embeddings differ slightly between backends and ONNX quantization presets, so
+    caches and stores key on it too.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (expected one of {', '.join(BACKENDS)}).")
+    return name if backend == "torch" else f"{name}@{backend}-qint8-{QUANTIZATION_CONFIG}"
+
+
+def get_embedding_model(name, backend=None):
+    """
+    Return the process-wide SentenceTransformer instance for `name` on `backend`,
+    loading it on first use. Concurrent callers share a single load.
+    """
+    key = model_id(name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _lock_for(key):
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            if key == name:
+                from sentence_transformers import SentenceTransformer
+
+                model = SentenceTransformer(name)
+            else:
+                from src.onnx_backend import load_onnx_model
+
+                model = load_onnx_model(name)
+            _load_times[key] = time.perf_counter() - start
+            _models[key] = model
+            print(f"Loaded embedding model '{key}' in {_load_times[key]:.2f}s")
+    return model
+
+
+def warm_up(names, backend=None):
+    """Load the given models ahead of the first request. Returns their load times."""
+    for name in names:
+        get_embedding_model(name, backend)
+    return {name: _load_times[model_id(name, backend)] for name in names}
+
+
+def load_times():
+    """Seconds spent loading each model in this process."""
+    return dict(_load_times)
+
+
+def loaded_models():
+    return list(_models)
@@ -0,0 +1,66 @@
+# File: TrendAnalysisAgent/src/onnx_backend.py
+
+import os
+import shutil
+
+from src.cache_utils import model_fingerprint
+
+ONNX_DIR = os.path.join("cache", "onnx")
+# onnxruntime dynamic quantization preset: "avx2" runs on any x86-64 node;
+# "avx512", "avx512_vnni" or "arm64" are faster on CPUs that support them.
+QUANTIZATION_CONFIG = os.environ.get("EMBEDDING_ONNX_QUANTIZATION", "avx2")
+
+
+def quantized_file(config=QUANTIZATION_CONFIG):
+    return f"onnx/model_qint8_{config}.onnx"
+
+
+def onnx_model_dir(name, onnx_dir=ONNX_DIR):
+    """
+    Export directory of a model. Local models are keyed by their fingerprint, so
+    retraining fine_tuned_model3 triggers a new export instead of reusing a stale one.
+    """
+    fingerprint = model_fingerprint(name) if os.path.exists(name) else "hub"
+    return os.path.join(onnx_dir, f"{os.path.basename(os.path.normpath(name))}-{fingerprint}")
+
+
+def export_onnx_model(name, config=QUANTIZATION_CONFIG, onnx_dir=ONNX_DIR):
+    """
+    Export a SentenceTransformer model to ONNX and quantize its weights to int8
+    (dynamic quantization: activations are quantized on the fly, so no calibration
+    data is needed). Done once per model version; returns the export directory.
+    """
+    directory = onnx_model_dir(name, onnx_dir)
+    target = os.path.join(directory, quantized_file(config))
+    if os.path.exists(target):
+        return directory
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    print(f"Exporting '{name}' to int8 ONNX ({config}) in {directory}...")
+    # Every process exports into its own directory (embedding workers may start the
+    # same export at once); the result is moved into place atomically.
+    tmp_dir = f"{directory}.{config}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        # Loading a PyTorch checkpoint with the ONNX backend converts it to ONNX
+        model = SentenceTransformer(name, backend="onnx", device="cpu")
+        model.save(tmp_dir)
+        export_dynamic_quantized_onnx_model(model, config, tmp_dir, file_suffix=f"qint8_{config}")
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # The export directory already exists (another preset, or a concurrent
+            # export finished first): add this preset's file and keep the others.
+            os.replace(os.path.join(tmp_dir, quantized_file(config)), target)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return directory
+
+
+def load_onnx_model(name, config=QUANTIZATION_CONFIG, onnx_dir=ONNX_DIR):
+    """The int8 ONNX version of a model (exported on first use), as a SentenceTransformer."""
+    from sentence_transformers import SentenceTransformer
+
+    directory = export_onnx_model(name, config, onnx_dir)
+    return SentenceTransformer(directory, backend="onnx", device="cpu",
+                               model_kwargs={"file_name": quantized_file(config)})
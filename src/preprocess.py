@@ -41,16 +41,146 @@
 
 # File: TrendAnalysisAgent/src/preprocess.py
 
+import atexit
 import json
+import multiprocessing
+import os
 import re
-from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from src.metrics import timed
+from src.process_pools import safe_start_method
+from src.stop_words import ENGLISH_STOP_WORDS
 
+# Records are read in batches of this size when streaming a corpus file.
+DEFAULT_BATCH_SIZE = 10_000
+_READ_CHUNK = 1 << 16
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that could extend a number decoded at the end of a read ("12" + "34", "1." + "5e3").
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+# Precompiled preprocessing pipeline. For ASCII text the regex is replaced by a
+# bytes.translate call that deletes exactly the characters the regex would remove.
+_NON_ALPHA = re.compile(r'[^a-z\s]')
+_ASCII_DELETE = bytes(i for i in range(128) if _NON_ALPHA.match(chr(i)))
+
+# Corpora smaller than this are preprocessed serially; process start-up would dominate.
+PARALLEL_THRESHOLD = 5_000
+_pool = None
+_pool_workers = None
+# Held while the pool is created, replaced or used, so a caller asking for another
+# worker count never shuts down a pool that is still mapping another caller's chunks
+_pool_lock = threading.Lock()
+
+@timed()
 def load_data(filepath):
     """Load JSON data from the given file path."""
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
     return data
 
+def iter_records(filepath):
+    """
+    Yield entries one at a time from a JSON array file or a JSONL file
+    (one JSON object per line), without loading the whole file into memory.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        first = _read_past_whitespace(f)[:1]
+        f.seek(0)
+        if first == "[":
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def _read_past_whitespace(f, chunk_size=_READ_CHUNK):
+    """Read from `f` until the first non-whitespace character; return the rest of that read."""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk or chunk.strip():
+            return chunk.lstrip()
+
+def _iter_json_array(f, chunk_size=_READ_CHUNK):
+    """
+    Incrementally decode the elements of a top-level JSON array, reading `f` in
+    chunks. Elements must be separated by exactly one comma. An element that may
+    continue past the text read so far (a number such as 12 followed by 34 in the
+    next chunk) is decoded again once more text is in.
+    """
+    decoder = json.JSONDecoder()
+    buf = _read_past_whitespace(f, chunk_size)[1:]  # drop the opening '['
+    pos = 0
+    eof = False
+    expect = "first"  # "first" element or ']', a "value" after a comma, or a "separator"
+    while True:
+        pos = _JSON_WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = chunk, 0
+            continue
+        char = buf[pos]
+        if expect == "separator":
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expect = "value"
+            continue
+        if char == "]" and expect == "first":
+            return
+        if char in ",]":
+            raise ValueError(f"Expected a value in JSON array, got {char!r}")
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        if end is None or (not eof and _NUMBER_TAIL.match(buf, end).end() == len(buf)):
+            # The element may continue past what was read; pull in more text and retry.
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        pos = end
+        expect = "separator"
+        yield record
+
+def iter_batches(items, batch_size=DEFAULT_BATCH_SIZE):
+    """Group an iterable into lists of at most `batch_size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_preprocessed_batches(filepath, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream a corpus file through combine_fields and preprocess_documents batch by batch."""
+    for records in iter_batches(iter_records(filepath), batch_size):
+        yield preprocess_documents(combine_fields(records))
+
+@timed()
+def load_preprocessed_documents(filepath, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Return the preprocessed documents of a corpus file. Only one batch of raw
+    records is held in memory at a time, so the loader adds no per-corpus overhead
+    on top of the returned list.
+    """
+    preprocessed_docs = []
+    for batch in iter_preprocessed_batches(filepath, batch_size):
+        preprocessed_docs.extend(batch)
+    return preprocessed_docs
+
+@timed()
 def combine_fields(data):
     """Combine title and summary fields into one document per entry."""
     documents = []
@@ -61,18 +191,58 @@ def combine_fields(data):
         documents.append(combined)
     return documents
 
-def preprocess(text):
+def preprocess(text, _stop_words=ENGLISH_STOP_WORDS):
     """Basic preprocessing: lowercasing, removing non-alphanumeric characters, and stopwords."""
     text = text.lower()
-    text = re.sub(r'[^a-z\s]', '', text)
-    words = text.split()
-    filtered_words = [word for word in words if word not in ENGLISH_STOP_WORDS]
-    return " ".join(filtered_words)
+    if text.isascii():
+        text = text.encode('ascii').translate(None, _ASCII_DELETE).decode('ascii')
+    else:
+        text = _NON_ALPHA.sub('', text)
+    return " ".join([word for word in text.split() if word not in _stop_words])
 
-def preprocess_documents(documents):
-    """Apply preprocessing to a list of documents."""
+def _preprocess_chunk(documents):
     return [preprocess(doc) for doc in documents]
 
+def _get_pool(workers):
+    """
+    Return a process pool with `workers` processes, reusing it across calls (call with
+    _pool_lock held). Workers are forked only while that is safe, otherwise spawned.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        context = multiprocessing.get_context(safe_start_method())
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        _pool_workers = workers
+    return _pool
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+@timed()
+def preprocess_documents(documents, workers=None):
+    """
+    Apply preprocessing to a list of documents.
+    Large inputs are split into chunks and preprocessed across a process pool
+    (`workers` processes, default: all cores); small inputs or workers=1 run serially.
+    The output is identical either way.
+    """
+    if not isinstance(documents, list):
+        documents = list(documents)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(documents) < PARALLEL_THRESHOLD:
+        return _preprocess_chunk(documents)
+    chunk_size = -(-len(documents) // (workers * 4))
+    chunks = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
+    preprocessed_docs = []
+    with _pool_lock:
+        for chunk in _get_pool(workers).map(_preprocess_chunk, chunks):
+            preprocessed_docs.extend(chunk)
+    return preprocessed_docs
+
 if __name__ == "__main__":
     # For quick testing; adjust the file path if needed.
     data = load_data("../data/summaries.json")
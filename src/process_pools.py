@@ -0,0 +1,17 @@
+# File: TrendAnalysisAgent/src/process_pools.py
+
+import multiprocessing
+import sys
+import threading
+
+
+def safe_start_method():
+    """
+    Start method for a new process pool: "fork" only while it is safe, i.e. the process
+    is single-threaded and torch has not been imported yet (no OpenMP pools or inference
+    threads to inherit); "spawn" otherwise.
+    """
+    if "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1 \
+            and "torch" not in sys.modules:
+        return "fork"
+    return "spawn"
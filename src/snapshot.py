@@ -0,0 +1,85 @@
+# File: TrendAnalysisAgent/src/snapshot.py
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from src.embedding_store import EmbeddingStore
+
+DEFAULT_SNAPSHOT_DIR = os.path.join("snapshots", "baseline")
+MODEL_DIRNAME = "model"
+STATE_FILENAME = "state.json"
+PROBS_FILENAME = "probs.npy"
+EMBEDDINGS_FILENAME = "embeddings.store"
+
+
+def save_snapshot(topic_model, topics, probs, data_hash, directory=DEFAULT_SNAPSHOT_DIR,
+                  embeddings=None, embedding_model_name=None, embedding_dtype="float16", summary=None, doc_ids=None):
+    """
+    Persist a fitted BERTopic model together with its document-topic assignments,
+    tagged with the hash of the data it was fitted on. The snapshot is written to
+    a temporary directory first so a crash never leaves a half-written snapshot.
+    If `embeddings` are given they are kept in a memory-mappable EmbeddingStore
+    (row i is document i). `summary` (get_topic_summary output) is kept in
+    state.json so readers can label topics without loading the model; `doc_ids`
+    records which corpus documents a model fitted on a subset covers.
+    """
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    topic_model.save(os.path.join(tmp_dir, MODEL_DIRNAME), serialization="pickle", save_embedding_model=False)
+    if probs is not None:
+        np.save(os.path.join(tmp_dir, PROBS_FILENAME), np.asarray(probs))
+    if embeddings is not None:
+        store = EmbeddingStore.create(os.path.join(tmp_dir, EMBEDDINGS_FILENAME),
+                                      embedding_model_name or "unknown", np.shape(embeddings)[1], embedding_dtype)
+        store.append([str(i) for i in range(len(embeddings))], embeddings)
+    state = {
+        "data_hash": data_hash,
+        "topics": [int(t) for t in topics],
+        "created_at": time.time(),
+    }
+    if summary is not None:
+        state["summary"] = summary
+    if doc_ids is not None:
+        state["doc_ids"] = [int(i) for i in doc_ids]
+    with open(os.path.join(tmp_dir, STATE_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def read_snapshot_state(directory=DEFAULT_SNAPSHOT_DIR):
+    """Return the snapshot's state.json contents, or None if there is no snapshot."""
+    path = os.path.join(directory, STATE_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_snapshot(data_hash, directory=DEFAULT_SNAPSHOT_DIR):
+    """
+    Load (topic_model, topics, probs) from a snapshot fitted on data with the given hash.
+    Returns None if there is no snapshot or it was fitted on different data.
+    """
+    state = read_snapshot_state(directory)
+    if state is None or state.get("data_hash") != data_hash:
+        return None
+    from bertopic import BERTopic
+
+    topic_model = BERTopic.load(os.path.join(directory, MODEL_DIRNAME))
+    probs_path = os.path.join(directory, PROBS_FILENAME)
+    probs = np.load(probs_path) if os.path.exists(probs_path) else None
+    return topic_model, state["topics"], probs
+
+
+def load_snapshot_embeddings(directory=DEFAULT_SNAPSHOT_DIR):
+    """The snapshot's EmbeddingStore (opened read-only via memmap), or None if it has none."""
+    path = os.path.join(directory, EMBEDDINGS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    return EmbeddingStore(path)
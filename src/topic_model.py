@@ -1,29 +1,50 @@
-from bertopic import BERTopic
-import umap
-import hdbscan
-from sentence_transformers import SentenceTransformer
+# bertopic, umap and hdbscan are imported on first use: importing this module for
+# print_topic_info / get_topic_summary over a saved model should stay cheap.
+from src.model_registry import get_embedding_model, model_id
+from src.embedding_executor import get_executor
+from src.embedding_cache import EmbeddingCache, encode_with_cache
+from src.metrics import timed, span
+from src.dedup import deduplicate, expand_topic_model
 
-def build_topic_model(documents, min_cluster_size=5):
+FINE_TUNED_MODEL_PATH = "fine_tuned_model3"
+
+# Default UMAP/HDBSCAN settings; build_topic_model and the sweep engine override them per run.
+UMAP_PARAMS = {
+    "n_neighbors": 15,
+    "n_components": 2,
+    "min_dist": 0.0,
+    "metric": "cosine",
+    "random_state": 42,
+}
+HDBSCAN_PARAMS = {
+    "min_cluster_size": 5,
+    "min_samples": 1,
+    "metric": "euclidean",
+    "prediction_data": True,
+}
+
+@timed()
+def build_topic_model(documents, min_cluster_size=5, umap_params=None, hdbscan_params=None, dedup=True):
     """
     Train a BERTopic model on the provided documents using the fine-tuned embedding model.
+    `umap_params` / `hdbscan_params` override individual entries of UMAP_PARAMS / HDBSCAN_PARAMS.
+    With `dedup`, only one representative of each group of (near-)duplicate documents
+    is embedded and clustered; topics and topic sizes still cover every document.
     """
+    import hdbscan
+    import umap
+    from bertopic import BERTopic
+
     # Configure UMAP
-    umap_model = umap.UMAP(
-        n_neighbors=15,
-        n_components=2,
-        min_dist=0.0,
-        metric='cosine',
-        random_state=42
-    )
+    umap_model = umap.UMAP(**{**UMAP_PARAMS, **(umap_params or {})})
     # Configure HDBSCAN
     hdbscan_model = hdbscan.HDBSCAN(
-        min_cluster_size=min_cluster_size,
-        min_samples=1,
-        metric='euclidean',
-        prediction_data=True
+        **{**HDBSCAN_PARAMS, "min_cluster_size": min_cluster_size, **(hdbscan_params or {})}
     )
-    # Load the fine-tuned SentenceTransformer model from disk
-    embedding_model = SentenceTransformer("fine_tuned_model3")
+    # Fine-tuned SentenceTransformer model (int8 ONNX with EMBEDDING_BACKEND=onnx), loaded
+    # once per process; the fit uses precomputed embeddings, the model embeds new
+    # documents in transform()
+    embedding_model = get_embedding_model(FINE_TUNED_MODEL_PATH)
     
     # Initialize and fit BERTopic with the fine-tuned embedding model
     topic_model = BERTopic(
@@ -32,9 +53,36 @@ def build_topic_model(documents, min_cluster_size=5):
         hdbscan_model=hdbscan_model,
         verbose=True
     )
-    topics, probs = topic_model.fit_transform(documents)
+    if not dedup:
+        embeddings = embed_documents(documents)
+        with span("fit_transform"):
+            topics, probs = topic_model.fit_transform(documents, embeddings)
+        return topic_model, topics, probs
+
+    duplicates = deduplicate(documents)
+    print(f"Deduplication: {len(documents)} documents -> {len(duplicates.representatives)} representatives.")
+    representatives = duplicates.select(documents)
+    embeddings = embed_documents(representatives)
+    with span("fit_transform"):
+        topics, probs = topic_model.fit_transform(representatives, embeddings)
+    topics, probs = expand_topic_model(topic_model, duplicates, topics, probs)
     return topic_model, topics, probs
 
+def embed_documents(documents, model_name=FINE_TUNED_MODEL_PATH, show_progress_bar=False):
+    """
+    Embed documents with the given model (the fine-tuned one by default),
+    serving previously seen documents from the on-disk embedding cache and
+    encoding the rest with the multi-core embedding executor.
+    """
+    cache = EmbeddingCache()
+
+    def encode(texts):
+        return get_executor(model_name).encode(texts, verbose=show_progress_bar)
+
+    embeddings = encode_with_cache(documents, model_id(model_name), encode, cache, verbose=True)
+    cache.close()
+    return embeddings
+
 def generate_topic_label(topic_words):
     """
     Generate a friendly label for a topic given its top keywords.
@@ -66,6 +114,7 @@ def print_topic_info(topic_model):
         count = topic_freq[topic_freq["Topic"] == topic]["Count"].values[0]
         print(f"Topic {topic} ({label}) - {count} documents")
         
+@timed()
 def get_topic_summary(topic_model):
     """
     Create a JSON-friendly summary of topics, including friendly labels,
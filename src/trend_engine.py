@@ -0,0 +1,217 @@
+# File: TrendAnalysisAgent/src/trend_engine.py
+
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.cache_utils import BoundedCache, file_digest
+from src.inverted_index import InvertedIndex
+from src.preprocess import combine_fields, iter_batches, iter_records, preprocess, preprocess_documents
+from src.snapshot import DEFAULT_SNAPSHOT_DIR, read_snapshot_state
+from src.trends import TrendIndex
+
+# A topic is bursting when its current window is this many standard deviations
+# above its historical windows and holds at least BURST_MIN_COUNT documents.
+BURST_Z = 2.0
+BURST_MIN_COUNT = 3
+DEFAULT_TOP_N = 5
+
+# Period words in a question -> (bin unit, number of bins in the window)
+PERIODS = {
+    "today": ("day", 1),
+    "day": ("day", 1),
+    "week": ("week", 1),
+    "month": ("month", 1),
+    "quarter": ("month", 3),
+    "year": ("month", 12),
+}
+_PERIOD_PATTERN = re.compile(r"\b(today|day|week|month|quarter|year)\b")
+_TOP_N_PATTERN = re.compile(r"\btop\s+(\d+)\b")
+_TOPIC_PATTERN = re.compile(r"\btopic\s+(-?\d+)\b")
+_PERIOD_QUALIFIER = r"(?:this|last|past|over|during|since)\b"
+_DOMAIN_PATTERN = re.compile(
+    r"\b(?:in|about|for|on)\s+(?!(?:the\s+)?" + _PERIOD_QUALIFIER + r")(.+?)(?=\s+" + _PERIOD_QUALIFIER + r"|[?.!]|$)"
+)
+_DECLINE_PATTERN = re.compile(r"\b(declin\w*|decreas\w*|drop\w*|fall\w*|fading|losing|cool\w*|shrink\w*)\b")
+_BURST_PATTERN = re.compile(r"\b(burst\w*|spik\w*|surg\w*|emerg\w*|sudden\w*)\b")
+
+
+def parse_query(query):
+    """
+    Turn a question such as "top 3 trends in AI this month" into
+    {"top_n", "unit", "window", "domain", "intent", "topic"}.
+    Intent is "growth" (default), "decline" or "burst".
+    """
+    text = query.lower()
+    period = _PERIOD_PATTERN.search(text)
+    unit, window = PERIODS[period.group(1)] if period else PERIODS["month"]
+    top_n = _TOP_N_PATTERN.search(text)
+    topic = _TOPIC_PATTERN.search(text)
+    domain = _DOMAIN_PATTERN.search(text)
+    domain = domain.group(1).strip() if domain else None
+    # "for the month" names a period, not a domain. Other domains are kept even when
+    # they preprocess to nothing ("in IT"), so they match no documents.
+    if domain and _PERIOD_PATTERN.fullmatch(preprocess(domain)):
+        domain = None
+    if _DECLINE_PATTERN.search(text):
+        intent = "decline"
+    elif _BURST_PATTERN.search(text):
+        intent = "burst"
+    else:
+        intent = "growth"
+    return {
+        "top_n": int(top_n.group(1)) if top_n else DEFAULT_TOP_N,
+        "unit": unit,
+        "window": window,
+        "domain": domain,
+        "intent": intent,
+        "topic": int(topic.group(1)) if topic else None,
+    }
+
+
+def window_stats(counts, window=1):
+    """
+    Growth, z-score and burst flags for every topic at once, from a bins x topics
+    count matrix. The current window is the last `window` bins; it is compared with
+    the window just before it (growth) and with every earlier non-overlapping
+    position of a sliding window (z-score).
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n_bins, n_topics = counts.shape
+    cumulative = np.vstack([np.zeros((1, n_topics)), np.cumsum(counts, axis=0)])
+    sums = cumulative[window:] - cumulative[:-window] if n_bins >= window else cumulative[-1:] - cumulative[:1]
+    current = sums[-1]
+    previous = sums[-1 - window] if len(sums) > window else np.zeros(n_topics)
+    growth = (current - previous) / np.maximum(previous, 1.0)
+
+    history = sums[:max(len(sums) - window, 0)]
+    if len(history) >= 2:
+        mean = history.mean(axis=0)
+        std = history.std(axis=0)
+        z_scores = np.divide(current - mean, std, out=np.zeros(n_topics), where=std > 0)
+    else:
+        z_scores = np.zeros(n_topics)
+    bursts = (z_scores >= BURST_Z) & (current >= BURST_MIN_COUNT) & (current > previous)
+    return {"current": current, "previous": previous, "growth": growth, "z_score": z_scores, "burst": bursts}
+
+
+class TrendEngine:
+    """
+    Answers trend questions from a TrendIndex over the fitted topic assignments.
+    Per-(domain, unit, window) statistics are cached, so repeated questions cost a
+    dictionary lookup and a sort; nothing is refitted.
+    """
+
+    def __init__(self, trend_index, labels, keyword_index=None, cache_size=128):
+        self.trend_index = trend_index
+        self.labels = labels
+        self.keyword_index = keyword_index
+        self._cache = BoundedCache(cache_size)
+
+    def label(self, topic):
+        if topic == -1:
+            return "Unclassified/Miscellaneous"
+        return self.labels.get(topic, f"Topic {topic}")
+
+    def stats(self, unit="month", window=1, domain=None):
+        """Cached (bin_starts, topic_ids, window_stats) for an optional domain filter."""
+        key = (unit, window, domain.lower() if domain else None)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        ids = None
+        if domain and self.keyword_index is not None:
+            ids = self.keyword_index.query(domain)
+        # Bins always run up to the latest document, so "this month" means the same for every domain
+        bin_starts, topic_ids, counts = self.trend_index.counts(unit, ids=ids, full_range=True)
+        result = (bin_starts, topic_ids, window_stats(counts, window) if len(counts) else None)
+        self._cache.put(key, result)
+        return result
+
+    def answer(self, query):
+        """Parse a question and return the ranked trends as a JSON-friendly dict."""
+        start = time.perf_counter()
+        parsed = parse_query(query)
+        bin_starts, topic_ids, stats = self.stats(parsed["unit"], parsed["window"], parsed["domain"])
+        result = {**parsed, "period": None, "trends": []}
+        if stats is None:
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            return result
+
+        window = min(parsed["window"], len(bin_starts))
+        result["period"] = [str(bin_starts[-window]), str(bin_starts[-1])]
+        if parsed["topic"] is not None:
+            candidates = np.flatnonzero(topic_ids == parsed["topic"])
+        else:
+            candidates = np.flatnonzero(topic_ids != -1)
+        # An explicit topic is always reported; otherwise keep only topics matching the intent
+        specific = parsed["topic"] is not None
+        if parsed["intent"] == "decline":
+            candidates = candidates[(stats["current"][candidates] < stats["previous"][candidates]) | specific]
+            order = np.lexsort((stats["current"][candidates], stats["growth"][candidates]))
+        elif parsed["intent"] == "burst":
+            candidates = candidates[stats["burst"][candidates] | specific]
+            order = np.argsort(-stats["z_score"][candidates], kind="stable")
+        else:
+            candidates = candidates[(stats["current"][candidates] > stats["previous"][candidates]) | specific]
+            order = np.lexsort((-stats["current"][candidates], -stats["growth"][candidates]))
+
+        for column in candidates[order][:parsed["top_n"]]:
+            topic = int(topic_ids[column])
+            result["trends"].append({
+                "topic_id": topic,
+                "label": self.label(topic),
+                "count": int(stats["current"][column]),
+                "previous_count": int(stats["previous"][column]),
+                "growth": float(stats["growth"][column]),
+                "z_score": float(stats["z_score"][column]),
+                "burst": bool(stats["burst"][column]),
+            })
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+
+def format_answer(result):
+    """Markdown lines describing an answer from TrendEngine.answer."""
+    if not result["trends"]:
+        return ["No matching trends found for this question."]
+    scope = f" in '{result['domain']}'" if result["domain"] else ""
+    heading = {"growth": "Top growing topics", "decline": "Top declining topics", "burst": "Bursting topics"}
+    start, end = result["period"]
+    period = f"{result['unit']} of {start}" if start == end else f"{result['unit']}s {start} to {end}"
+    lines = [f"**{heading[result['intent']]}{scope} ({period}):**"]
+    for rank, trend in enumerate(result["trends"], start=1):
+        change = f"{trend['growth'] * 100:+.0f}%" if trend["previous_count"] else "new"
+        previous = f"previous {result['window']} {result['unit']}s" if result["window"] > 1 else f"previous {result['unit']}"
+        burst = " 🔥 burst" if trend["burst"] else ""
+        lines.append(
+            f"{rank}. {trend['label']} (topic {trend['topic_id']}): {trend['count']} documents, "
+            f"{change} vs {previous}, z={trend['z_score']:.1f}{burst}"
+        )
+    return lines
+
+
+def _parse_date(date_str):
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def load_trend_engine(data_path, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    Build a TrendEngine from the baseline snapshot's topic assignments and labels
+    plus the dates in the data file. Returns None when there is no snapshot for the
+    current data (start app.py once to create it).
+    """
+    state = read_snapshot_state(snapshot_dir)
+    if state is None or state.get("data_hash") != file_digest(data_path):
+        return None
+    documents, timestamps = [], []
+    for records in iter_batches(iter_records(data_path)):
+        documents.extend(preprocess_documents(combine_fields(records)))
+        timestamps.extend(_parse_date(entry.get("date")) for entry in records)
+    labels = {int(item["topic_id"]): item["label"] for item in state.get("summary", [])}
+    return TrendEngine(TrendIndex(state["topics"], timestamps), labels, InvertedIndex(documents))
@@ -0,0 +1,178 @@
+# File: TrendAnalysisAgent/src/trends.py
+
+from datetime import datetime
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.cache_utils import BoundedCache
+
+BIN_UNITS = ("day", "week", "month")
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+_WEEK_SHIFT = 3
+
+
+def _bucket_ids(days, unit):
+    """Integer bucket id of each datetime64[D] value for the given bin unit."""
+    day_numbers = days.astype(np.int64)
+    if unit == "day":
+        return day_numbers
+    if unit == "week":
+        return (day_numbers + _WEEK_SHIFT) // 7
+    if unit == "month":
+        return days.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown bin '{unit}' (expected one of {', '.join(BIN_UNITS)}).")
+
+
+def _bucket_starts(bucket_ids, unit):
+    """First day (datetime64[D]) of each bucket id."""
+    if unit == "day":
+        return bucket_ids.astype("datetime64[D]")
+    if unit == "week":
+        return (bucket_ids * 7 - _WEEK_SHIFT).astype("datetime64[D]")
+    return bucket_ids.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def bin_start_timestamps(timestamps, unit):
+    """
+    Replace each timestamp by the start (midnight) of its calendar day/week/month bin,
+    the same bins TrendIndex.counts uses; None stays None. Passing these to BERTopic's
+    topics_over_time (without nr_bins) yields one row per calendar bin and topic.
+    """
+    days = np.array(
+        [ts.strftime("%Y-%m-%d") if ts is not None else "NaT" for ts in timestamps], dtype="datetime64[D]"
+    )
+    dated = ~np.isnat(days)
+    starts = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[D]")
+    starts[dated] = _bucket_starts(_bucket_ids(days[dated], unit), unit)
+    return [datetime.combine(day.astype(object), datetime.min.time()) if ok else None
+            for day, ok in zip(starts, dated)]
+
+
+class TrendIndex:
+    """
+    Per-topic document counts over time, computed from fitted topic assignments.
+    Dated documents are sorted once by day; date ranges are resolved with
+    searchsorted and counts per (bin, topic) with a single bincount over
+    precomputed integer bucket ids. Bin keywords (c-TF-IDF) are only computed for
+    the bins a caller asks for, and cached.
+    """
+
+    def __init__(self, topics, timestamps, documents=None, topic_model=None, keyword_cache_size=256):
+        days = np.array(
+            [ts.strftime("%Y-%m-%d") if ts is not None else "NaT" for ts in timestamps], dtype="datetime64[D]"
+        )
+        dated = np.flatnonzero(~np.isnat(days))
+        order = np.argsort(days[dated], kind="stable")
+        self.doc_ids = dated[order]
+        self.days = days[self.doc_ids]
+        topics = np.asarray(topics)
+        self.topic_ids = np.unique(topics)
+        self.topic_rows = np.searchsorted(self.topic_ids, topics[self.doc_ids])
+        self.n_documents = len(topics)
+        self.documents = documents
+        self.topic_model = topic_model
+        self._buckets = {}
+        self._keywords = BoundedCache(keyword_cache_size)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def buckets(self, unit):
+        """Bucket id of every dated document (in day order) for `unit`, computed once per unit."""
+        if unit not in self._buckets:
+            self._buckets[unit] = _bucket_ids(self.days, unit)
+        return self._buckets[unit]
+
+    def date_range(self, start=None, end=None):
+        """Slice of the day-sorted documents within the inclusive YYYY-MM-DD range."""
+        lo = np.searchsorted(self.days, np.datetime64(start, "D"), "left") if start else 0
+        hi = np.searchsorted(self.days, np.datetime64(end, "D"), "right") if end else len(self.days)
+        return slice(lo, max(lo, hi))
+
+    def _selection(self, start, end, ids):
+        """Positions (into the day-sorted arrays) of the documents in range, optionally restricted to `ids`."""
+        window = self.date_range(start, end)
+        positions = np.arange(window.start, window.stop)
+        if ids is not None:
+            member = np.zeros(self.n_documents, dtype=bool)
+            member[np.asarray(ids, dtype=np.int64)] = True
+            positions = positions[member[self.doc_ids[positions]]]
+        return positions
+
+    def counts(self, unit="week", start=None, end=None, ids=None, full_range=False):
+        """
+        Returns (bin_starts, topic_ids, counts) where counts[i, j] is the number of
+        documents of topic_ids[j] in the bin starting at bin_starts[i]. Every bin
+        between the first and last matching document is included, empty or not;
+        with `full_range` the bins span all dated documents in the date range, so
+        filtered series line up with the unfiltered one.
+        `ids` optionally restricts the counts to a subset of document ids.
+        """
+        positions = self._selection(start, end, ids)
+        n_topics = len(self.topic_ids)
+        if len(positions) == 0:
+            return np.array([], dtype="datetime64[D]"), self.topic_ids, np.zeros((0, n_topics), dtype=np.int64)
+        buckets = self.buckets(unit)[positions]
+        if full_range:
+            window = self.date_range(start, end)
+            first, last = self.buckets(unit)[window.start], self.buckets(unit)[window.stop - 1]
+        else:
+            first, last = buckets[0], buckets[-1]
+        n_bins = int(last - first) + 1
+        flat = (buckets - first) * n_topics + self.topic_rows[positions]
+        counts = np.bincount(flat, minlength=n_bins * n_topics).reshape(n_bins, n_topics)
+        return _bucket_starts(np.arange(first, first + n_bins), unit), self.topic_ids, counts
+
+    def n_bins(self, unit="week"):
+        buckets = self.buckets(unit)
+        return int(buckets[-1] - buckets[0]) + 1 if len(buckets) else 0
+
+    def to_dict(self, unit="week", start=None, end=None, ids=None):
+        """Compact JSON-friendly form: bin start dates, topic ids and a bins x topics count matrix."""
+        bin_starts, topic_ids, counts = self.counts(unit, start, end, ids)
+        return {
+            "bin": unit,
+            "bins": [str(d) for d in bin_starts],
+            "topics": [int(t) for t in topic_ids],
+            "counts": counts.tolist(),
+        }
+
+    def keywords(self, unit, date, topic=None, top_n=10):
+        """
+        c-TF-IDF keywords of each topic within the bin containing `date` (YYYY-MM-DD),
+        using the fitted model's vectorizer and IDF weights. Returns {topic: [words]}.
+        """
+        if self.documents is None or self.topic_model is None:
+            raise ValueError("Bin keywords need the documents and the fitted topic model.")
+        bucket = _bucket_ids(np.array([date], dtype="datetime64[D]"), unit)[0]
+        key = (unit, int(bucket), topic, top_n)
+        cached = self._keywords.get(key)
+        if cached is not None:
+            return cached
+
+        buckets = self.buckets(unit)
+        window = slice(np.searchsorted(buckets, bucket, "left"), np.searchsorted(buckets, bucket, "right"))
+        rows = self.topic_rows[window]
+        positions = np.arange(window.start, window.stop)
+        if topic is not None:
+            keep = self.topic_ids[rows] == topic
+            rows, positions = rows[keep], positions[keep]
+
+        result = {}
+        if len(positions):
+            present, rows = np.unique(rows, return_inverse=True)
+            doc_counts = self.topic_model.vectorizer_model.transform(
+                [self.documents[i] for i in self.doc_ids[positions]]
+            )
+            assignment = sp.csr_matrix(
+                (np.ones(len(rows)), (rows, np.arange(len(rows)))), shape=(len(present), len(rows))
+            )
+            c_tf_idf = self.topic_model.ctfidf_model.transform(assignment @ doc_counts)
+            words = self.topic_model.vectorizer_model.get_feature_names_out()
+            for row, topic_row in enumerate(present):
+                scores = c_tf_idf.getrow(row).toarray().ravel()
+                best = np.argsort(scores)[::-1][:top_n]
+                result[int(self.topic_ids[topic_row])] = [words[i] for i in best if scores[i] > 0]
+        self._keywords.put(key, result)
+        return result
@@ -0,0 +1,96 @@
+# File: TrendAnalysisAgent/src/visuals.py
+
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache_utils import model_fingerprint
+from src.metrics import span
+
+VISUALS_CACHE_DIR = os.path.join("cache", "visuals")
+
+# Chart file name -> (BERTopic method, keyword arguments)
+CHARTS = {
+    "topic_viz.html": ("visualize_topics", {}),
+    "bar_chart.html": ("visualize_barchart", {"top_n_topics": 10}),
+    "hierarchy.html": ("visualize_hierarchy", {}),
+    "heatmap.html": ("visualize_heatmap", {}),
+}
+
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+# Models loaded by worker processes, by fingerprint
+_loaded_models = {}
+
+
+def chart_path(fingerprint, filename, cache_dir=VISUALS_CACHE_DIR):
+    return os.path.join(cache_dir, fingerprint, filename)
+
+
+def _render_lock(path):
+    with _render_locks_guard:
+        return _render_locks.setdefault(path, threading.Lock())
+
+
+def render_chart(filename, fingerprint, topic_model=None, model_path=None, cache_dir=VISUALS_CACHE_DIR):
+    """
+    Path of the cached HTML for one chart of the model with this fingerprint,
+    rendering it first if needed. The model is either passed in or loaded from
+    `model_path`; concurrent requests for the same chart render it once.
+    """
+    if filename not in CHARTS:
+        raise ValueError(f"Unknown chart '{filename}' (expected one of {', '.join(CHARTS)}).")
+    path = chart_path(fingerprint, filename, cache_dir)
+    if os.path.exists(path):
+        return path
+    with _render_lock(path):
+        if os.path.exists(path):
+            return path
+        if topic_model is None:
+            topic_model = _loaded_models.get(fingerprint)
+            if topic_model is None:
+                from bertopic import BERTopic
+
+                topic_model = _loaded_models[fingerprint] = BERTopic.load(model_path)
+        method, kwargs = CHARTS[filename]
+        with span("render_chart"):
+            fig = getattr(topic_model, method)(**kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fig.write_html(tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+def _render_saved(args):
+    filename, fingerprint, model_path, cache_dir = args
+    try:
+        return filename, render_chart(filename, fingerprint, model_path=model_path, cache_dir=cache_dir), None
+    except Exception as e:
+        return filename, None, str(e)
+
+
+def render_all(model_path, filenames=None, workers=None, cache_dir=VISUALS_CACHE_DIR, publish_dir=None):
+    """
+    Batch mode: render every chart of a saved model in parallel worker processes
+    (cached charts are skipped). With `publish_dir` the charts are also copied
+    there. Returns {filename: path or None}; failures are printed, not raised.
+    """
+    fingerprint = model_fingerprint(model_path)
+    filenames = list(filenames or CHARTS)
+    missing = [f for f in filenames if not os.path.exists(chart_path(fingerprint, f, cache_dir))]
+    paths = {f: chart_path(fingerprint, f, cache_dir) for f in filenames if f not in missing}
+    if missing:
+        workers = min(workers or os.cpu_count() or 1, len(missing))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for filename, path, error in pool.map(_render_saved, [(f, fingerprint, model_path, cache_dir) for f in missing]):
+                if error is not None:
+                    print(f"⚠️ Could not render {filename}: {error}")
+                paths[filename] = path
+    if publish_dir:
+        os.makedirs(publish_dir, exist_ok=True)
+        for filename, path in paths.items():
+            if path is not None:
+                shutil.copyfile(path, os.path.join(publish_dir, filename))
+    return paths
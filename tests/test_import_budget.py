@@ -0,0 +1,21 @@
+# File: TrendAnalysisAgent/tests/test_import_budget.py
+
+import os
+
+import pytest
+
+from eval.import_budget import DEFAULT_BUDGETS, HEAVY_MODULES, measure
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_heavy_modules_are_checked():
+    assert {"torch", "bertopic", "sentence_transformers"} <= set(HEAVY_MODULES)
+
+
+@pytest.mark.parametrize("module, budget", sorted(DEFAULT_BUDGETS.items()))
+def test_import_budget(module, budget, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    seconds, heavy = measure(module)
+    assert heavy == [], f"{module} imports heavy dependencies eagerly: {', '.join(heavy)}"
+    assert seconds <= budget, f"{module} took {seconds * 1000:.0f} ms to import (budget {budget * 1000:.0f} ms)"
@@ -0,0 +1,57 @@
+# File: TrendAnalysisAgent/tests/test_preprocess.py
+
+import io
+import json
+
+import pytest
+
+from src.preprocess import _iter_json_array
+
+RECORDS = [
+    {"title": "Quantum error correction", "summary": "Surface codes, [brackets], and \"quotes\"."},
+    1234567890123,
+    -0.000125e-3,
+    "a string, with a comma",
+    [1, [2, 3], {}],
+    True,
+    None,
+]
+
+
+def decode(text, chunk_size):
+    return list(_iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("separator", [",", ", ", "\n ,\n\t"])
+def test_elements_split_at_every_chunk_boundary(separator):
+    text = "  [ " + separator.join(json.dumps(record) for record in RECORDS) + " ]\n"
+    for chunk_size in range(1, len(text) + 1):
+        assert decode(text, chunk_size) == RECORDS, chunk_size
+
+
+def test_number_ending_at_chunk_boundary_is_not_split():
+    for chunk_size in range(1, 20):
+        assert decode("[1234567890123, 2]", chunk_size) == [1234567890123, 2]
+        assert decode("[2,1234567890123]", chunk_size) == [2, 1234567890123]
+
+
+@pytest.mark.parametrize("text", ["[]", "[ ]", " \n[\n]\n"])
+def test_empty_array(text):
+    assert decode(text, 1) == []
+    assert decode(text, 64) == []
+
+
+@pytest.mark.parametrize("text", [
+    '[{"a": 1},,{"b": 2}]',
+    '[,{"a": 1}]',
+    '[{"a": 1},]',
+    '[{"a": 1} {"b": 2}]',
+    '[,]',
+    '[{"a": 1}',
+    '[{"a": 1},',
+    '[{"a": ',
+])
+def test_malformed_arrays_are_rejected(text):
+    for chunk_size in (1, 3, 64):
+        with pytest.raises(ValueError):
+            decode(text, chunk_size)
@@ -1,7 +1,18 @@
 import streamlit as st
 import pandas as pd
+import hashlib
+import io
 import os
-from bertopic import BERTopic
+import shutil
+import time
+
+from src.embedding_cache import EmbeddingCache, encode_with_cache
+from src.jobs import JobManager, DONE, FAILED
+from src.embedding_executor import get_executor
+from src.model_registry import model_id
+from src.cache_utils import file_fingerprint
+from src.snapshot import DEFAULT_SNAPSHOT_DIR, STATE_FILENAME
+from src.trend_engine import load_trend_engine, format_answer
 
 st.set_page_config(page_title="Trends Agent", layout="wide")
 
@@ -10,6 +21,125 @@ st.sidebar.title("🧠 Trends Agent")
 mode = st.sidebar.radio("Choose Mode", ["Run BERTopic", "View Visualizations", "Ask Agent"])
 
 output_dir = "output"
+DATA_PATH = os.path.join("data", "summaries.json")
+# Fitted models and their visualizations, one directory per upload content hash
+UPLOAD_CACHE_DIR = os.path.join("cache", "uploads")
+CSV_CHUNK_ROWS = 50_000
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+VISUALIZATIONS = {
+    "topic_viz.html": lambda model, tot: model.visualize_topics(),
+    "bar_chart.html": lambda model, tot: model.visualize_barchart(),
+    "heatmap.html": lambda model, tot: model.visualize_heatmap(),
+    "hierarchy.html": lambda model, tot: model.visualize_hierarchy(),
+    "topics_over_time.html": lambda model, tot: model.visualize_topics_over_time(tot) if tot is not None else None,
+}
+
+
+@st.cache_resource
+def get_trend_engines():
+    """Trend engines by (data file, snapshot) version, shared by every session of this server process."""
+    return {}
+
+
+def get_trend_engine():
+    """
+    Trend engine over the baseline snapshot. It is rebuilt when the data file or the
+    snapshot changes; a missing snapshot is not cached, so the next ask retries.
+    """
+    state_path = os.path.join(DEFAULT_SNAPSHOT_DIR, STATE_FILENAME)
+    if not os.path.exists(state_path):
+        return None
+    version = (file_fingerprint(DATA_PATH), file_fingerprint(state_path))
+    engines = get_trend_engines()
+    engine = engines.get(version)
+    if engine is None:
+        engine = load_trend_engine(DATA_PATH)
+        if engine is not None:
+            engines.clear()
+            engines[version] = engine
+    return engine
+
+
+@st.cache_resource
+def get_fit_jobs():
+    """Background fit jobs, shared by every session of this Streamlit server process."""
+    return JobManager(max_workers=1), {}
+
+
+def read_upload(data):
+    """
+    Documents and timestamps (None without a 'timestamp' column) of an uploaded CSV.
+    Only those two columns are parsed, CSV_CHUNK_ROWS rows at a time, and each chunk
+    is reduced to plain lists, so no DataFrame of the whole upload is ever built.
+    """
+    docs, timestamps, has_timestamps = [], [], False
+    for chunk in pd.read_csv(io.BytesIO(data), chunksize=CSV_CHUNK_ROWS,
+                             usecols=lambda column: column in ("text", "timestamp")):
+        chunk = chunk.dropna(subset=["text"])
+        docs.extend(chunk["text"].astype(str).tolist())
+        has_timestamps = "timestamp" in chunk.columns
+        if has_timestamps:
+            timestamps.extend(pd.to_datetime(chunk["timestamp"]).tolist())
+    return docs, timestamps if has_timestamps else None
+
+
+def upload_artifacts_dir(digest):
+    return os.path.join(UPLOAD_CACHE_DIR, digest)
+
+
+def fit_upload(report, digest, docs, timestamps=None):
+    """Fit BERTopic on an uploaded dataset and render its visualizations into the upload cache."""
+    directory = upload_artifacts_dir(digest)
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    report("embeddings", 0.05)
+    cache = EmbeddingCache()
+    encode = get_executor(EMBEDDING_MODEL_NAME).encode
+    embeddings = encode_with_cache(docs, model_id(EMBEDDING_MODEL_NAME), encode, cache, verbose=True)
+    cache.close()
+
+    report("fit_transform", 0.3)
+    from bertopic import BERTopic
+    topic_model = BERTopic(verbose=True)
+    topics, _ = topic_model.fit_transform(docs, embeddings)
+    tot = None
+    if timestamps is not None:
+        report("topics_over_time", 0.6)
+        tot = topic_model.topics_over_time(docs, timestamps, topics=topics)
+
+    for i, (filename, render) in enumerate(VISUALIZATIONS.items()):
+        report(filename, 0.65 + 0.3 * i / len(VISUALIZATIONS))
+        try:
+            fig = render(topic_model, tot)
+        except Exception as e:
+            print(f"⚠️ Could not render {filename}: {e}")
+            continue
+        if fig is not None:
+            fig.write_html(os.path.join(tmp_dir, filename))
+
+    report("saving model", 0.95)
+    topic_model.save(os.path.join(tmp_dir, "model"), serialization="pickle", save_embedding_model=False)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return directory
+
+
+def publish_visualizations(directory):
+    """Copy an upload's visualizations into output/, where "View Visualizations" reads them."""
+    os.makedirs(output_dir, exist_ok=True)
+    for filename in VISUALIZATIONS:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            shutil.copyfile(path, os.path.join(output_dir, filename))
+
+
+@st.cache_data(show_spinner=False)
+def read_visual(path, mtime_ns):
+    """HTML of a visualization, re-read only when the file changes."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
 
 # 1️⃣ Run BERTopic
 if mode == "Run BERTopic":
@@ -17,23 +147,33 @@ if mode == "Run BERTopic":
     uploaded_file = st.file_uploader("Upload a CSV file with 'text' and 'timestamp' columns", type=["csv"])
 
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
-
-        st.dataframe(df.head())
-
-        if st.button("Run BERTopic"):
-            with st.spinner("Running topic modeling..."):
-                topic_model = BERTopic(verbose=True)
-                topics, _ = topic_model.fit_transform(df["text"])
-                topic_model.visualize_topics().write_html(os.path.join(output_dir, "topic_viz.html"))
-                topic_model.visualize_barchart().write_html(os.path.join(output_dir, "bar_chart.html"))
-                topic_model.visualize_heatmap().write_html(os.path.join(output_dir, "heatmap.html"))
-                topic_model.visualize_hierarchy().write_html(os.path.join(output_dir, "hierarchy.html"))
-                if "timestamp" in df.columns:
-                    df["timestamp"] = pd.to_datetime(df["timestamp"])
-                    topic_model.visualize_topics_over_time(df["text"], topics, df["timestamp"]).write_html(
-                        os.path.join(output_dir, "topics_over_time.html"))
+        data = uploaded_file.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        jobs, job_ids = get_fit_jobs()
+        job = jobs.get(job_ids.get(digest, ""))
+
+        st.dataframe(pd.read_csv(io.BytesIO(data), nrows=5))
 
+        if os.path.isdir(upload_artifacts_dir(digest)) and (job is None or job.finished):
+            if st.button("Run BERTopic"):
+                # Same file as an earlier run: reuse its model and visualizations
+                publish_visualizations(upload_artifacts_dir(digest))
+                st.success("BERTopic results for this file were already cached; visualizations saved!")
+        elif job is not None and not job.finished:
+            st.progress(job.progress, text=f"Running topic modeling ({job.stage or 'queued'})...")
+            time.sleep(1)
+            st.rerun()
+        else:
+            if job is not None and job.status == FAILED:
+                st.error(f"BERTopic failed: {job.error}")
+            if st.button("Run BERTopic"):
+                docs, timestamps = read_upload(data)
+                job, _ = jobs.submit(digest, fit_upload, digest, docs, timestamps)
+                job_ids[digest] = job.id
+                st.rerun()
+
+        if job is not None and job.status == DONE and job_ids.pop(digest, None):
+            publish_visualizations(job.result)
             st.success("BERTopic completed and visualizations saved!")
 
 # 2️⃣ Visualizations
@@ -50,9 +190,8 @@ elif mode == "View Visualizations":
     selected_vis = st.selectbox("Choose a Visualization", list(visual_files.keys()))
     vis_path = os.path.join(output_dir, visual_files[selected_vis])
     if os.path.exists(vis_path):
-        with open(vis_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-            st.components.v1.html(html_content, height=700, scrolling=True)
+        html_content = read_visual(vis_path, os.stat(vis_path).st_mtime_ns)
+        st.components.v1.html(html_content, height=700, scrolling=True)
     else:
         st.warning("Visualization not found. Please run BERTopic first.")
 
@@ -62,12 +201,11 @@ elif mode == "Ask Agent":
     user_query = st.text_input("Ask a question like: What are the top 3 trends in AI this month?")
 
     if st.button("Ask") and user_query:
-        # Mock output for now (you can replace with a real backend call)
-        st.markdown("**Top 3 Topics:**")
-        st.markdown("1. Instruction-tuned LLMs")
-        st.markdown("2. Multimodal Agents")
-        st.markdown("3. Evaluation of Tool-Use")
-        st.markdown("📈 Topic 2 has seen a 250% increase since last month.")
-
-        st.info("This is a mocked response. You can connect this to a FastAPI backend using LangChain or simple keyword routing.")
-
+        engine = get_trend_engine()
+        if engine is None:
+            st.warning("No topic model snapshot for the current data. Start app.py once to build it.")
+        else:
+            result = engine.answer(user_query)
+            for line in format_answer(result):
+                st.markdown(line)
+            st.caption(f"Answered from cached trend aggregates in {result['elapsed_ms']:.1f} ms.")